@@ -1,19 +1,25 @@
 import streamlit as st
-import psycopg
+from psycopg import sql
+from psycopg.rows import dict_row
+from psycopg import errors as pg_errors
+from psycopg_pool import ConnectionPool
 import pandas as pd
 import os
-# import time
-from databricks import sdk
-from databricks.sdk import WorkspaceClient
-from databricks_ai_bridge import ModelServingUserCredentials
-import plotly.express as px
+import io
+import datetime as _dt
+import time
+import traceback
 from dotenv import load_dotenv
 import logging
 import requests
 import json
+import re
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Optional
 from model_serving_utils import query_endpoint_stream, _get_endpoint_task_type
-from mlflow.types.responses import ResponsesAgentStreamEvent
 
 
 logging.basicConfig(level=logging.INFO)
@@ -25,11 +31,149 @@ load_dotenv()
 # Database configuration variables
 DATABASE_REMEDIATION_DATA = os.getenv("DATABASE_REMEDIATION_DATA", "akshay_student_remediation_db")
 
+# Connection pool lifetime (seconds, roughly one OAuth token lifetime) and the
+# maximum number of per-user pools kept open at once
+DB_POOL_TTL = int(os.getenv("DB_POOL_TTL", "3600"))
+DB_POOL_MAX_ENTRIES = int(os.getenv("DB_POOL_MAX_ENTRIES", "32"))
+# Log who each new database connection runs as; costs one query per physical connection.
+# An explicit flag, since model_serving_utils configures the root logger at DEBUG
+DB_LOG_CONNECTION_IDENTITY = os.getenv("DB_LOG_CONNECTION_IDENTITY", "false").lower() in ("1", "true", "yes")
+
 # Databricks Model Serving Endpoint Configuration
 SERVING_ENDPOINT = os.getenv("SERVING_ENDPOINT")
+# Number of serving endpoint responses kept in the in-process response cache
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))
+# Lifetime (seconds) of a cached serving endpoint response
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+# Number of remediation cards rendered per page on the Scheduled Remediations page
+REMEDIATIONS_PAGE_SIZE = int(os.getenv("REMEDIATIONS_PAGE_SIZE", "25"))
+# Number of students sent to the browser per page of the dashboard table
+STUDENTS_PAGE_SIZE = int(os.getenv("STUDENTS_PAGE_SIZE", "50"))
+# Lifetime (seconds) of a cached per-user serving client, kept under the token lifetime
+LLM_CLIENT_TTL = int(os.getenv("LLM_CLIENT_TTL", "3000"))
+# Maximum number of per-user serving clients kept at once
+LLM_CLIENT_MAX_ENTRIES = int(os.getenv("LLM_CLIENT_MAX_ENTRIES", "32"))
+
+# Intervention form options (built once at import instead of on every rerun)
+INTERVENTION_OPTIONS = (
+    "Academic Meeting",
+    "Study Plan Assignment",
+    "Tutoring Referral",
+    "Counseling Referral",
+    "Financial Aid Consultation",
+    "Career Guidance Session",
+    "Peer Mentoring Program",
+    "Academic Probation Review"
+)
+PRIORITY_OPTIONS = ("High", "Medium", "Low")
+RISK_CATEGORY_ORDER = ("High Risk", "Medium Risk", "Low Risk", "Excellent")
+MEETING_TYPE_OPTIONS = ("In-Person", "Virtual", "Phone")
+STUDY_DURATION_OPTIONS = ("2 weeks", "1 month", "1 semester")
+FOCUS_AREA_OPTIONS = ("Time Management", "Note Taking", "Test Preparation", "Research Skills", "Writing Skills")
+TUTORING_TYPE_OPTIONS = ("Individual", "Group", "Online")
+TUTORING_FREQUENCY_OPTIONS = ("Once a week", "Twice a week", "Three times a week")
+COUNSELING_TYPE_OPTIONS = ("Academic", "Personal", "Career", "Mental Health")
+URGENCY_OPTIONS = ("Immediate", "Within a week", "Within a month")
+STUDENT_SORT_OPTIONS = ("Risk Level", "Surname", "GPA (Low to High)", "GPA (High to Low)",
+                        "Failing Courses", "Student ID")
+SORT_ORDER_OPTIONS = ("Default", "Ascending", "Descending")
+RISK_BADGES = {"High Risk": "🔴 ", "Medium Risk": "🟠 ", "Low Risk": "🟡 ", "Excellent": "🟢 "}
+
+# Display colors
+RISK_COLORS = {
+    'High Risk': '#FF4B4B',
+    'Medium Risk': '#FFA500',
+    'Low Risk': '#00CC88',
+    'Excellent': '#28A745'
+}
+PRIORITY_COLORS = {
+    'High': '#FF4B4B',
+    'Medium': '#FFA500',
+    'Low': '#00CC88'
+}
+DEFAULT_COLOR = '#808080'
+
+# Static HTML, formatted once at import instead of on every render
+_LEGEND_ITEM_HTML = '<div style="display: flex; align-items: center; margin-right: 24px;"><div style="width: 20px; height: 20px; background-color: {color}; margin-right: 8px; border-radius: 3px;"></div><span>{label}</span></div>'
+PRIORITY_LEGEND_HTML = '<div style="display: flex; flex-wrap: wrap;">' + ''.join(
+    _LEGEND_ITEM_HTML.format(color=color, label=f"{priority} Priority")
+    for priority, color in PRIORITY_COLORS.items()
+) + '</div>'
+_REMEDIATION_CARD_HTML = """
+<div style="padding: 15px; border-left: 4px solid {color}; margin: 10px 0; background-color: {color}10; border-radius: 5px;">
+    <h4 style="margin: 0; color: {color};">{intervention_type}</h4>
+    <p style="margin: 5px 0; color: gray;"><strong>Student ID:</strong> {student_id}</p>
+    <p style="margin: 5px 0; color: gray;"><strong>Priority:</strong> {priority}</p>
+    <p style="margin: 5px 0; color: gray;"><strong>Created:</strong> {created} by {created_by} · <strong>Status:</strong> {status}</p>
+</div>
+"""
+
+# Risk categories with their own metric on the dashboard summary row
+_SUMMARY_RISK_CATEGORIES = ("High Risk", "Medium Risk", "Excellent")
+
+# Risk categories that get rules-based recommendations instead of an LLM call
+RULES_RISK_CATEGORIES = frozenset({"Low Risk", "Excellent"})
+
+# Default meeting times suggested for AI-generated meetings
+_TIME_10AM = _dt.time(10, 0)
+_TIME_2PM = _dt.time(14, 0)
+_TIME_3PM = _dt.time(15, 0)
+
+# Priority -> (meeting type, days until meeting, time); low or unknown priority uses the default
+_MEETING_SCHEDULE_BY_PRIORITY = {
+    'high': ('In-Person', 1, _TIME_10AM),
+    'medium': ('Virtual', 3, _TIME_2PM)
+}
+_DEFAULT_MEETING_SCHEDULE = ('Virtual', 7, _TIME_3PM)
+
+# Option -> selectbox index lookups
+_INTERVENTION_INDEX = {option: i for i, option in enumerate(INTERVENTION_OPTIONS)}
+_PRIORITY_INDEX = {option: i for i, option in enumerate(PRIORITY_OPTIONS)}
+_MEETING_TYPE_INDEX = {option: i for i, option in enumerate(MEETING_TYPE_OPTIONS)}
+
+# Session state keys cleared together by the Create Intervention page
+_AI_DETAILS_KEYS = frozenset({
+    'ai_generated_details', 'ai_selected_intervention_type', 'ai_selected_priority'
+})
+_AI_RECOMMENDATION_KEYS = _AI_DETAILS_KEYS | {'ai_recommendations'}
+_FORM_CLEANUP_KEYS = _AI_RECOMMENDATION_KEYS | {
+    'selected_student', 'parsed_ai_recommendations', 'ai_meeting_details', 'applied_recommendation'
+}
+# Student fields carried to the Create Intervention page in st.session_state.selected_student
+_SELECTED_STUDENT_FIELDS = ('student_id', 'full_name', 'major', 'year_level', 'gpa', 'risk_category')
+_SELECTED_RECOMMENDATION_KEYS = frozenset({
+    'selected_recommendation', 'selected_recommendation_index',
+    'ai_generated_details', 'ai_meeting_details', 'applied_recommendation'
+})
+
+def clear_session_keys(keys):
+    """Remove the given keys from session state, skipping any that are not set"""
+    # Only touches the listed keys; intersecting with st.session_state would walk
+    # every key in the session, widget state included
+    for key in keys:
+        st.session_state.pop(key, None)
+
+# Button on_click callbacks run before the rerun the click triggers, so state
+# changes made here don't need a second st.rerun() to show up
+def set_session_values(**values):
+    """Set several session state values at once"""
+    for key, value in values.items():
+        st.session_state[key] = value
+
+def add_to_session_set(key, item):
+    """Add an item to a set kept in session state, creating the set if needed"""
+    st.session_state.setdefault(key, set()).add(item)
 
 def get_user_credentials():
-    """Get user authorization credentials from Streamlit headers"""
+    """Get user authorization credentials from Streamlit headers.
+
+    The forwarded headers are fixed for the lifetime of a browser session, so the
+    result is stored in session state and reused on every subsequent rerun.
+    """
+    cached_credentials = st.session_state.get('_user_creds')
+    if cached_credentials is not None:
+        return cached_credentials
+
     user_email = st.context.headers.get('x-forwarded-email')
     user_token = st.context.headers.get('x-forwarded-access-token')
     
@@ -40,104 +184,249 @@ def get_user_credentials():
         st.error("❌ User authorization token not found. Please ensure the app has proper user authorization scopes configured.")
         st.info("This app requires user authorization to access your data with your permissions.")
         st.stop()
-    
+
+    st.session_state['_user_creds'] = (user_email, user_token)
     return user_email, user_token
 
 logger.info(f"DATABASE_REMEDIATION_DATA: {DATABASE_REMEDIATION_DATA}")
 
-# Database connection setup - using user authorization with direct connections
+# Database connection setup - using user authorization with per-user connection pools
+
+def build_conn_string(dbname, user_email, postgres_password):
+    """Build a libpq connection string for the given user"""
+    # Use the user email from the OAuth token instead of PGUSER
+    return (
+        f"dbname={dbname} "
+        f"user={user_email} "
+        f"password={postgres_password} "
+        f"host={os.getenv('PGHOST')} "
+        f"port={os.getenv('PGPORT')} "
+        f"sslmode={os.getenv('PGSSLMODE', 'require')} "
+        f"application_name={os.getenv('PGAPPNAME')} "
+        f"connect_timeout=10"
+    )
+
+def log_connection_identity(conn):
+    """Pool configure callback: log who each new physical connection runs as
+    
+    Only installed when DB_LOG_CONNECTION_IDENTITY is set.
+    """
+    current_user, session_user = conn.execute("SELECT current_user, session_user").fetchone()
+    # The pool requires configured connections to be returned idle
+    conn.commit()
+    logger.info(f"Connected as current_user: {current_user}, session_user: {session_user}")
+
+# Pools are evicted after DB_POOL_TTL seconds or beyond DB_POOL_MAX_ENTRIES; an evicted
+# pool closes its connections once the last borrower returns it and it is collected
+@st.cache_resource(show_spinner=False, ttl=DB_POOL_TTL, max_entries=DB_POOL_MAX_ENTRIES)
+def get_connection_pool(dbname, user_email, user_token):
+    """Create a connection pool for one user and database, shared across reruns.
+
+    The password is the user's OAuth token, so the token is part of the cache key
+    and a refreshed token gets a fresh pool. Returned connections are rolled back
+    to an idle state by the pool before being reused.
+    """
+    logger.info(f"Creating connection pool for {dbname} and user {user_email}")
+    if DB_LOG_CONNECTION_IDENTITY:
+        logger.info(f"Connection string (password hidden): dbname={dbname} user={user_email} host={os.getenv('PGHOST')} port={os.getenv('PGPORT')}")
 
-def get_postgres_password():
-    """Get PostgreSQL password using user authorization token"""
+    pool = ConnectionPool(
+        build_conn_string(dbname, user_email, user_token),
+        min_size=1,
+        max_size=4,
+        # Fail a borrow after 10s instead of psycopg_pool's 30s default
+        timeout=10,
+        max_idle=300,
+        # Recycle connections well inside the pool's own DB_POOL_TTL
+        max_lifetime=1800,
+        # Server-side prepare statements from their second execution on
+        kwargs={'prepare_threshold': 2},
+        configure=log_connection_identity if DB_LOG_CONNECTION_IDENTITY else None,
+        open=True
+    )
     try:
-        user_email, user_token = get_user_credentials()
-        logger.info("Using user authorization token for PostgreSQL connection")
-        return user_token
-    except Exception as e:
-        st.error(f"❌ Failed to get user authorization token: {str(e)}")
-        st.stop()
+        # Surface connection/auth failures here instead of on first borrow
+        pool.wait(timeout=10)
+    except Exception:
+        pool.close()
+        raise
+
+    return pool
 
 def get_connection(dbname=None):
-    """Get a direct connection using user authorization (no pooling to avoid timeout issues)."""
+    """Borrow a pooled connection using user authorization.
+
+    Returns a context manager: the connection goes back to the pool when the
+    ``with`` block exits (committed on success, rolled back on error).
+
+    The pool is looked up through the cache on every call rather than held in
+    session state, so the cache's TTL / max_entries bound on open pools holds.
+    """
     try:
         # Use default database if none specified
         if dbname is None:
             dbname = os.getenv('PGDATABASE')
-        
+
         user_email, user_token = get_user_credentials()
-        postgres_password = get_postgres_password()
-        
-        # Create direct connection without pooling to avoid timeout issues
-        # Use the user email from the OAuth token instead of PGUSER
-        conn_string = (
-            f"dbname={dbname} "
-            f"user={user_email} "
-            f"password={postgres_password} "
-            f"host={os.getenv('PGHOST')} "
-            f"port={os.getenv('PGPORT')} "
-            f"sslmode={os.getenv('PGSSLMODE', 'require')} "
-            f"application_name={os.getenv('PGAPPNAME')} "
-            f"connect_timeout=10"
-        )
-        
-        logger.info(f"Creating direct connection to {dbname} for user {user_email}")
-        logger.info(f"Connection string (password hidden): dbname={dbname} user={user_email} host={os.getenv('PGHOST')} port={os.getenv('PGPORT')}")
-        
-        conn = psycopg.connect(conn_string)
-        
-        # Test the connection and log current user
-        with conn.cursor() as cur:
-            cur.execute("SELECT 1")
-            cur.execute("SELECT current_user, session_user")
-            current_user, session_user = cur.fetchone()
-            logger.info(f"Connected as current_user: {current_user}, session_user: {session_user}")
-        
-        return conn
-        
+        pool = get_connection_pool(dbname, user_email, user_token)
+
     except Exception as e:
         logger.error(f"Failed to get database connection: {str(e)}")
         st.error(f"❌ Database connection failed: {str(e)}")
         st.info("Please ensure you have proper permissions to access the database.")
         st.stop()
 
+    return pool.connection()
+
 
 # LLM-Powered Intervention Recommendation Functions
 
+# Entries memoized by each of the pure AI-text formatters below
+TEXT_FORMAT_CACHE_SIZE = 256
+
+# Precompiled patterns for cleaning up AI text
+_DISPLAY_CLUTTER_RE = re.compile(r'\*\*|---|={10,}|#')  # bold markers, rules, headers
+_RULE_LINE_RE = re.compile(r'[\s=|-]*')  # blank lines or lines made only of = - |
+_DISPLAY_NUMBERED_RE = re.compile(r'\n([1-5]\.)')
+_EXTRA_NEWLINES_RE = re.compile(r'\n{3,}')
+# List numbers like "2. " (not versions, decimals such as GPA 2.5, or "12.")
+_LIST_NUMBER_RE = re.compile(r'(?<![\d.])([1-9])\.(?=\s)')
+
+# Keywords that indicate actionable content / meta-reasoning (substring matches)
+_ACTION_KEYWORDS_RE = re.compile(
+    r"recommend|suggest|should|need|priority|timeline|action|meeting|tutoring|counseling|academic|intervention",
+    re.IGNORECASE
+)
+_META_REASONING_RE = re.compile(r"we need to|let's|probably|perhaps|but we need to choose", re.IGNORECASE)
+
+# Prompt instructions that sometimes leak into the AI response
+_PROMPT_LEAK_RE = re.compile(
+    r"likely academic meeting|provide priority levels|use numbered list|double line breaks"
+    r"|single line breaks|provide actionable steps|choose from these interventions"
+    r"|format each recommendation|copy exactly"
+    r"|^\s*(?:important:|required format:|use double|use single)",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Agent tags and JSON wrappers in streamed MAS output
+_THINK_TAG_RE = re.compile(r'<think>(.*?)</think>', re.DOTALL | re.IGNORECASE)
+_NAME_TAG_RE = re.compile(r'<name>(.*?)</name>', re.DOTALL | re.IGNORECASE)
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n')
+_JSON_CODE_BLOCK_RE = re.compile(r'```(?:json)?\s*\n(.*?)\n```', re.DOTALL)
+_JSON_RECOMMENDATIONS_RE = re.compile(r'\{[\s\S]*"recommendations"[\s\S]*\}')
+
+# Structured output schema for intervention recommendations (never varies, so built once)
+INTERVENTION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "intervention_recommendations",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "recommendations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "intervention_type": {
+                                "type": "string",
+                                "enum": list(INTERVENTION_OPTIONS)
+                            },
+                            "priority": {
+                                "type": "string",
+                                "enum": list(PRIORITY_OPTIONS)
+                            },
+                            "action": {
+                                "type": "string",
+                                "description": "Brief specific action explaining why this student needs this intervention"
+                            },
+                            "timeline": {
+                                "type": "string",
+                                "description": "When to implement this intervention"
+                            },
+                            "goal": {
+                                "type": "string",
+                                "description": "Measurable outcome specific to this student"
+                            }
+                        },
+                        "required": ["intervention_type", "priority", "action", "timeline", "goal"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["recommendations"],
+            "additionalProperties": False
+        },
+        "strict": True
+    }
+}
+_INTERVENTION_SCHEMA_HASH = hashlib.blake2b(
+    json.dumps(INTERVENTION_RESPONSE_FORMAT, sort_keys=True).encode(), digest_size=8
+).hexdigest()
+
+# Recommendation prompt; only the student fields are filled in per call
+_RECOMMENDATIONS_PROMPT_TEMPLATE = """
+Provide 3 concise intervention recommendations for this student. Each recommendation should directly address their specific situation.
+
+Student: {full_name} ({major}, {year_level})
+GPA: {gpa} | Failing: {failing_grades}/{courses_enrolled} courses | Risk: {risk_category}
+
+For each recommendation:
+- Choose intervention_type from: Academic Meeting, Study Plan Assignment, Tutoring Referral, Counseling Referral, Financial Aid Consultation, Career Guidance Session, Peer Mentoring Program, Academic Probation Review
+- Choose intervention modality from: In-Person, Virtual, Phone
+- Set priority: High, Medium, or Low
+- Write brief action explaining why this specific student needs this intervention based on the suggested intervention type and modality historical performance data
+- Specify timeline for implementation
+- Define measurable goal specific to this student's situation
+- Add some best practices for each intervention type and modality suggested based on the unstructured best practices documents available. 
+
+Respond with a JSON object containing an array of 3 recommendations and the information above.
+"""
+
+# Legacy plain-text recommendations: numbered headers and labelled field lines
+_LEGACY_REC_LINE_RE = re.compile(
+    r'^[ \t]*(?:[123]\.(?P<header>.*)|(?P<field>Action|Timeline|Goal|Objective):(?P<value>.*))',
+    re.MULTILINE
+)
+_LEGACY_REC_HEADER_RE = re.compile(r'(?P<type>.*?) - \[?Priority:(?P<priority>[^\]]*?)(?: - |\]|$)')
+_LEGACY_FIELD_KEYS = {'Action': 'action', 'Timeline': 'timeline', 'Goal': 'goal', 'Objective': 'goal'}
+
+
 def extract_useful_text_from_structured_response(content_list) -> Optional[str]:
     """Extract useful recommendation text from multi-agent-supervisor structured response"""
     try:
-        # First, try to find the final text component from the last element
-        # This handles the specific format: [{'type': 'reasoning', ...}, {'type': 'text', 'text': '...'}]
-        if content_list and len(content_list) > 0:
-            # Look for the last element with type 'text'
-            for item in reversed(content_list):
-                if isinstance(item, dict) and item.get('type') == 'text' and 'text' in item:
-                    logger.info(f"Found final text component: {item['text'][:100]}...")
-                    return str(item['text'])
-        
-        # Fallback: extract text from any element (original logic)
-        useful_parts = []
+        # The final answer is the last {'type': 'text'} element, normally the very last
+        # item of the usual [{'type': 'reasoning', ...}, {'type': 'text', 'text': '...'}]
+        # format, so search from the end and stop at the first hit
+        content_list = content_list or ()
+        final_text = next(
+            (item['text'] for item in reversed(content_list)
+             if isinstance(item, dict) and item.get('type') == 'text' and 'text' in item),
+            None
+        )
+        if final_text is not None:
+            logger.info(f"Found final text component: {final_text[:100]}...")
+            return str(final_text)
         
+        # Fallback: one walk collecting the useful parts, cleaning up reasoning text
+        # to its actionable parts
+        useful_parts = []
         for item in content_list:
-            if isinstance(item, dict):
-                # Look for summary text in the structure
-                if 'summary' in item and isinstance(item['summary'], list):
-                    for summary_item in item['summary']:
-                        if isinstance(summary_item, dict) and 'text' in summary_item:
-                            text = summary_item['text']
-                            # Clean up the reasoning text and extract actionable parts
-                            cleaned_text = clean_reasoning_text(text)
-                            if cleaned_text:
-                                useful_parts.append(cleaned_text)
-                
-                # Look for direct text content
-                elif 'text' in item:
-                    useful_parts.append(str(item['text']))
-                
-                # Look for other useful fields
-                elif 'content' in item:
-                    useful_parts.append(str(item['content']))
+            if not isinstance(item, dict):
+                continue
+            
+            # Look for summary text in the structure
+            if isinstance(summary := item.get('summary'), list):
+                useful_parts.extend(
+                    clean_reasoning_text(summary_item['text']) for summary_item in summary
+                    if isinstance(summary_item, dict) and 'text' in summary_item
+                )
+            
+            # Look for direct text content, then other useful fields
+            elif (text := item.get('text', item.get('content'))) is not None:
+                useful_parts.append(str(text))
         
+        useful_parts = [part for part in useful_parts if part]
         if useful_parts:
             return " ".join(useful_parts)
         
@@ -147,73 +436,42 @@ def extract_useful_text_from_structured_response(content_list) -> Optional[str]:
         logger.info(f"Error extracting structured response: {e}")
         return None
 
+@functools.lru_cache(maxsize=TEXT_FORMAT_CACHE_SIZE)
 def clean_reasoning_text(text: str) -> str:
     """Clean up reasoning text to extract actionable recommendations"""
     if not text:
         return ""
     
-    # Split into sentences and look for actionable content
-    sentences = text.split('. ')
-    useful_sentences = []
-    
-    # Keywords that indicate actionable content
-    action_keywords = [
-        'recommend', 'suggest', 'should', 'need', 'priority', 'timeline', 
-        'action', 'meeting', 'tutoring', 'counseling', 'academic', 'intervention'
+    # Split into sentences and keep actionable, non-meta-reasoning content; each
+    # keyword group is one compiled alternation, so a sentence costs two C-level scans
+    useful_sentences = [
+        sentence for sentence in map(str.strip, text.split('. '))
+        if _ACTION_KEYWORDS_RE.search(sentence) and not _META_REASONING_RE.search(sentence)
     ]
     
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if any(keyword in sentence.lower() for keyword in action_keywords):
-            # Skip meta-reasoning sentences
-            if not any(meta in sentence.lower() for meta in [
-                'we need to', 'let\'s', 'probably', 'perhaps', 'but we need to choose'
-            ]):
-                useful_sentences.append(sentence)
-    
     if useful_sentences:
         return '. '.join(useful_sentences) + '.'
     
     # Fallback: return a cleaned version of the original
     return text.replace('We need to produce structured recommendation.', '').strip()
 
+@functools.lru_cache(maxsize=TEXT_FORMAT_CACHE_SIZE)
 def clean_ai_response(ai_text: str) -> str:
     """Clean AI response to remove any prompt instructions or unwanted text"""
     if not ai_text:
         return ai_text
     
-    # Remove common prompt instruction leakage
-    lines = ai_text.split('\n')
-    clean_lines = []
-    
-    skip_phrases = [
-        'likely academic meeting',
-        'provide priority levels',
-        'use numbered list',
-        'double line breaks',
-        'single line breaks',
-        'provide actionable steps',
-        'choose from these interventions',
-        'format each recommendation',
-        'copy exactly'
-    ]
+    # Most responses contain no leaked instructions, so skip the line split
+    if not _PROMPT_LEAK_RE.search(ai_text):
+        return ai_text.strip()
     
-    for line in lines:
-        line_lower = line.lower().strip()
-        
-        # Skip lines that contain prompt instructions
-        if any(phrase in line_lower for phrase in skip_phrases):
-            continue
-            
-        # Skip lines that are just formatting instructions
-        if line_lower.startswith(('important:', 'required format:', 'use double', 'use single')):
-            continue
-            
-        # Keep the actual content
-        clean_lines.append(line)
+    # Remove common prompt instruction leakage and formatting instructions,
+    # keeping the actual content
+    clean_lines = [line for line in ai_text.split('\n') if not _PROMPT_LEAK_RE.search(line)]
     
     return '\n'.join(clean_lines).strip()
 
+@functools.lru_cache(maxsize=TEXT_FORMAT_CACHE_SIZE)
 def format_ai_recommendations(ai_text: str) -> str:
     """Format AI recommendations with proper line breaks and structure"""
     if not ai_text:
@@ -223,84 +481,101 @@ def format_ai_recommendations(ai_text: str) -> str:
     formatted_text = ai_text.strip()
     
     # Ensure numbered items start on new lines
-    formatted_text = formatted_text.replace('1.', '\n\n1.')
-    formatted_text = formatted_text.replace('2.', '\n\n2.')
-    formatted_text = formatted_text.replace('3.', '\n\n3.')
+    formatted_text = _LIST_NUMBER_RE.sub(r'\n\n\1.', formatted_text)
     
     # Clean up multiple newlines
-    while '\n\n\n' in formatted_text:
-        formatted_text = formatted_text.replace('\n\n\n', '\n\n')
+    formatted_text = _EXTRA_NEWLINES_RE.sub('\n\n', formatted_text)
     
     # Remove leading newlines
     formatted_text = formatted_text.lstrip('\n')
     
     return formatted_text
 
+@functools.lru_cache(maxsize=TEXT_FORMAT_CACHE_SIZE)
 def format_intervention_details_for_display(ai_details: str) -> str:
     """Format AI-generated intervention details for better readability"""
     if not ai_details:
         return ai_details
     
-    # Clean up the text for text area display
-    formatted_text = ai_details
-    
-    # Remove problematic formatting that causes display issues
-    formatted_text = formatted_text.replace('**', '')
-    formatted_text = formatted_text.replace('---', '')
-    
-    # Remove equals signs and hash symbols that create visual clutter
-    formatted_text = formatted_text.replace('='*50, '')
-    formatted_text = formatted_text.replace('='*40, '')
-    formatted_text = formatted_text.replace('='*30, '')
-    formatted_text = formatted_text.replace('='*20, '')
-    formatted_text = formatted_text.replace('='*10, '')
-    formatted_text = formatted_text.replace('#', '')
-    
-    # Clean up any table formatting completely
-    if '|' in formatted_text:
-        lines = formatted_text.split('\n')
-        clean_lines = []
-        
-        for line in lines:
-            # Skip any line with table formatting
-            if '|' in line or '---' in line:
-                # Try to extract meaningful content from table rows
-                if '|' in line and line.count('|') >= 2:
-                    parts = [part.strip() for part in line.split('|') if part.strip()]
-                    if len(parts) >= 2 and not any(header in parts[0] for header in ['#', 'Action', 'Who', 'Deadline']):
-                        clean_lines.append(f"• {parts[1] if len(parts) > 1 else parts[0]}")
-                continue
-            else:
-                clean_lines.append(line)
-        
-        formatted_text = '\n'.join(clean_lines)
+    # Remove bold markers, horizontal rules, long runs of equals signs and hash
+    # symbols that cause display issues, in a single pass
+    formatted_text = _DISPLAY_CLUTTER_RE.sub('', ai_details)
     
-    # Clean up lines that are just equals signs or dashes
-    lines = formatted_text.split('\n')
     clean_lines = []
-    for line in lines:
-        stripped = line.strip()
-        # Skip lines that are just equals signs, dashes, or pipes
-        if not stripped or stripped.replace('=', '').replace('-', '').replace('|', '').strip() == '':
+    for line in formatted_text.split('\n'):
+        # Skip blank lines and lines that are just equals signs, dashes, or pipes
+        if _RULE_LINE_RE.fullmatch(line):
+            continue
+
+        # Clean up any table formatting completely
+        if '|' in line:
+            # Try to extract meaningful content from table rows
+            if line.count('|') >= 2:
+                parts = [part.strip() for part in line.split('|') if part.strip()]
+                if len(parts) >= 2 and not any(header in parts[0] for header in ['#', 'Action', 'Who', 'Deadline']):
+                    clean_lines.append(f"• {parts[1] if len(parts) > 1 else parts[0]}")
             continue
+
         clean_lines.append(line)
     
     formatted_text = '\n'.join(clean_lines)
     
     # Ensure proper spacing for numbered lists and bullet points
     formatted_text = formatted_text.replace('\n•', '\n• ')  # Ensure space after bullet
-    formatted_text = formatted_text.replace('\n1.', '\n\n1.')  # Add space before numbered items
-    formatted_text = formatted_text.replace('\n2.', '\n\n2.')
-    formatted_text = formatted_text.replace('\n3.', '\n\n3.')
-    formatted_text = formatted_text.replace('\n4.', '\n\n4.')
-    formatted_text = formatted_text.replace('\n5.', '\n\n5.')
+    formatted_text = _DISPLAY_NUMBERED_RE.sub(r'\n\n\1', formatted_text)  # Add space before numbered items
     
     # Clean up excessive newlines
-    while '\n\n\n' in formatted_text:
-        formatted_text = formatted_text.replace('\n\n\n', '\n\n')
+    formatted_text = _EXTRA_NEWLINES_RE.sub('\n\n', formatted_text)
     
     return formatted_text.strip()
 
+# Recommendation fields used for the Create page's pre-filled details, in argument order
+_RECOMMENDATION_DETAIL_FIELDS = (
+    'intervention_type', 'priority', 'action', 'timeline', 'measurable_goal', 'goal', 'best_practices'
+)
+
+@functools.lru_cache(maxsize=TEXT_FORMAT_CACHE_SIZE)
+def format_recommendation_details(rec_index: int, intervention_type: str, priority: str, action: str,
+                                  timeline: str, measurable_goal: str, goal: str, best_practices: str) -> str:
+    """Intervention details text for a selected recommendation; empty fields are left out"""
+    details_text = f"🤖 AI-Generated Recommendation #{rec_index}\n\n"
+    details_text += f"Intervention Type: {intervention_type or 'N/A'}\n"
+    details_text += f"Priority Level: {priority or 'N/A'}\n\n"
+    
+    if action:
+        details_text += f"Recommended Action:\n{action}\n\n"
+    
+    if timeline:
+        details_text += f"Timeline: {timeline}\n\n"
+    
+    if measurable_goal:
+        details_text += f"Measurable Goal: {measurable_goal}\n\n"
+    elif goal:
+        details_text += f"Goal: {goal}\n\n"
+    
+    if best_practices:
+        details_text += f"Best Practices:\n{best_practices}"
+    
+    return details_text
+
+@st.cache_resource(show_spinner=False, ttl=LLM_CLIENT_TTL, max_entries=LLM_CLIENT_MAX_ENTRIES)
+def get_serving_client(user_email, user_token):
+    """Create an OBO-authenticated WorkspaceClient for one user, shared across calls.
+
+    Building the client resolves the credentials strategy and host config, which is
+    too slow to repeat for every LLM request. The token is part of the cache key so a
+    refreshed token gets a fresh client.
+    """
+    # Imported here so sessions that never call the LLM don't pay the SDK's import cost
+    from databricks.sdk import WorkspaceClient
+    from databricks_ai_bridge import ModelServingUserCredentials
+
+    user_client = WorkspaceClient(credentials_strategy=ModelServingUserCredentials())
+    logger.info(f"WorkspaceClient configured with ModelServingUserCredentials (OBO) for {user_email}")
+    logger.info(f"MAS endpoint host: {user_client.config.host}")
+    return user_client
+
+
 def call_databricks_serving_endpoint(prompt: str, max_tokens: int = 500, response_format: Optional[Dict] = None) -> Optional[Dict]:
     """Call Databricks multi-agent-supervisor endpoint using OBO authentication
     
@@ -329,16 +604,12 @@ def call_databricks_serving_endpoint(prompt: str, max_tokens: int = 500, respons
     try:
         logger.info(f"Calling multi-agent-supervisor endpoint: {SERVING_ENDPOINT}")
         
-        # Get user credentials for logging
-        user_email, _ = get_user_credentials()
+        user_email, user_token = get_user_credentials()
         logger.info(f"Using OBO authentication for user: {user_email}")
         
-        # Configure WorkspaceClient with OBO authentication
+        # Reuse the user's WorkspaceClient with OBO authentication
         # This automatically uses the user's OAuth token from the request headers
-        user_client = WorkspaceClient(credentials_strategy=ModelServingUserCredentials())
-        
-        logger.info(f"WorkspaceClient configured with ModelServingUserCredentials (OBO)")
-        logger.info(f"MAS endpoint host: {user_client.config.host}")
+        user_client = get_serving_client(user_email, user_token)
         
         # Prepare the request payload using MAS-specific schema
         # MAS expects 'input' as an array, we'll pass the messages in the format it understands
@@ -362,10 +633,22 @@ def call_databricks_serving_endpoint(prompt: str, max_tokens: int = 500, respons
         logger.info(f"Calling serving endpoint with OBO credentials...")
         
         try:
-            response = user_client.serving_endpoints.query(
-                name=SERVING_ENDPOINT,
-                dataframe_records=dataframe_records
-            )
+            try:
+                response = user_client.serving_endpoints.query(
+                    name=SERVING_ENDPOINT,
+                    dataframe_records=dataframe_records
+                )
+            except Exception as auth_error:
+                # A cached client can outlive its credentials; rebuild it once and retry
+                if "401" not in str(auth_error) and "unauthenticated" not in str(auth_error).lower():
+                    raise
+                logger.warning("Serving client credentials rejected, rebuilding client")
+                get_serving_client.clear()
+                user_client = get_serving_client(user_email, user_token)
+                response = user_client.serving_endpoints.query(
+                    name=SERVING_ENDPOINT,
+                    dataframe_records=dataframe_records
+                )
             
             logger.info(f"Response received successfully from MAS")
             logger.info(f"Response type: {type(response)}")
@@ -692,7 +975,6 @@ def call_databricks_serving_endpoint(prompt: str, max_tokens: int = 500, respons
     except Exception as e:
         logger.error(f"Error calling multi-agent-supervisor endpoint: {str(e)}")
         logger.info(f"Full error details: {type(e).__name__}: {e}")
-        import traceback
         logger.info(f"Traceback: {traceback.format_exc()}")
         # Return empty dict structure instead of None
         return {
@@ -702,79 +984,250 @@ def call_databricks_serving_endpoint(prompt: str, max_tokens: int = 500, respons
             'raw_response': None
         }
 
+@st.cache_resource(show_spinner=False)
+def get_llm_response_cache():
+    """Process-wide LRU store of serving endpoint responses and the lock guarding it"""
+    return OrderedDict(), threading.Lock()
 
-def generate_intervention_recommendations(student_data: Dict) -> Dict[str, any]:
-    """Generate intelligent intervention recommendations using LLM with structured output"""
+
+def get_response_format_hash(response_format: Optional[Dict]) -> Optional[str]:
+    """Stable hash of a response_format schema, used to bucket cached responses"""
+    if not response_format:
+        return None
+    if response_format is INTERVENTION_RESPONSE_FORMAT:
+        return _INTERVENTION_SCHEMA_HASH
+    return hashlib.blake2b(json.dumps(response_format, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def cached_call_databricks_serving_endpoint(prompt: str, max_tokens: int = 500, response_format: Optional[Dict] = None) -> Optional[Dict]:
+    """Call the serving endpoint, reusing the response to an identical earlier request
     
-    # Define the JSON schema for structured output
-    response_format = {
-        "type": "json_schema",
-        "json_schema": {
-            "name": "intervention_recommendations",
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "recommendations": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "intervention_type": {
-                                    "type": "string",
-                                    "enum": ["Academic Meeting", "Study Plan Assignment", "Tutoring Referral", 
-                                           "Counseling Referral", "Financial Aid Consultation", "Career Guidance Session", 
-                                           "Peer Mentoring Program", "Academic Probation Review"]
-                                },
-                                "priority": {
-                                    "type": "string",
-                                    "enum": ["High", "Medium", "Low"]
-                                },
-                                "action": {
-                                    "type": "string",
-                                    "description": "Brief specific action explaining why this student needs this intervention"
-                                },
-                                "timeline": {
-                                    "type": "string",
-                                    "description": "When to implement this intervention"
-                                },
-                                "goal": {
-                                    "type": "string",
-                                    "description": "Measurable outcome specific to this student"
-                                }
-                            },
-                            "required": ["intervention_type", "priority", "action", "timeline", "goal"],
-                            "additionalProperties": False
-                        }
-                    }
-                },
-                "required": ["recommendations"],
-                "additionalProperties": False
-            },
-            "strict": True
-        }
-    }
+    Entries are scoped to the user (calls run On-Behalf-Of the user, so tool results
+    depend on their permissions), the endpoint, the response schema and max_tokens.
+    Only responses with content are cached so failures are retried.
+    """
+    cache_key = get_llm_cache_key(prompt, max_tokens, response_format)
+    response = get_cached_llm_response(cache_key)
+    if response is not None:
+        return response
+    
+    response = call_databricks_serving_endpoint(prompt, max_tokens=max_tokens, response_format=response_format)
+    store_llm_response(cache_key, response)
+    return response
+
+
+def get_llm_cache_key(prompt: str, max_tokens: int, response_format: Optional[Dict] = None) -> tuple:
+    """Response cache key for a request made by the current user"""
+    user_email, _ = get_user_credentials()
+    return (
+        user_email,
+        SERVING_ENDPOINT,
+        get_response_format_hash(response_format),
+        max_tokens,
+        hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    )
+
+
+def get_cached_llm_response(cache_key: tuple) -> Optional[Dict]:
+    """Cached response for ``cache_key`` if it is younger than LLM_CACHE_TTL, or None"""
+    entries, lock = get_llm_response_cache()
+    with lock:
+        entry = entries.get(cache_key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > LLM_CACHE_TTL:
+            del entries[cache_key]
+            return None
+        entries.move_to_end(cache_key)
+    logger.info("Serving endpoint response served from cache")
+    return response
+
+
+def store_llm_response(cache_key: tuple, response: Optional[Dict], content_field: str = 'content'):
+    """Cache a response if its ``content_field`` is non-empty, evicting the least recently used entries"""
+    if response and response.get(content_field):
+        entries, lock = get_llm_response_cache()
+        with lock:
+            entries[cache_key] = (time.monotonic(), response)
+            entries.move_to_end(cache_key)
+            while len(entries) > LLM_CACHE_MAX_ENTRIES:
+                entries.popitem(last=False)
+
+
+def discard_llm_response(cache_key: tuple):
+    """Drop a cached response so the next request goes to the endpoint"""
+    entries, lock = get_llm_response_cache()
+    with lock:
+        entries.pop(cache_key, None)
+
+
+def stream_serving_endpoint_text(prompt: str, max_tokens: int):
+    """Yield response text from the serving endpoint as it is generated
+    
+    Streams through the OpenAI client of the user's OBO WorkspaceClient, so the call
+    runs with the user's permissions just like call_databricks_serving_endpoint.
+    Agent (responses) endpoints send text deltas and then the completed message item;
+    the item's text is only used for messages that arrived without deltas. Chat
+    endpoints send chat-completion chunks.
+    """
+    user_email, user_token = get_user_credentials()
+    openai_client = get_serving_client(user_email, user_token).serving_endpoints.get_open_ai_client()
+    messages = [{"role": "user", "content": prompt}]
     
-    # Create a structured prompt
-    prompt = f"""
-Provide 3 concise intervention recommendations for this student. Each recommendation should directly address their specific situation.
+    if _get_endpoint_task_type(SERVING_ENDPOINT) == "agent/v1/responses":
+        stream = openai_client.responses.create(
+            model=SERVING_ENDPOINT, input=messages, max_output_tokens=max_tokens, temperature=0.7, stream=True
+        )
+        streamed_deltas = False
+        for event in stream:
+            if event.type == "response.output_text.delta":
+                if event.delta:
+                    streamed_deltas = True
+                    yield event.delta
+            elif event.type == "response.output_item.done":
+                if event.item.type == "message" and not streamed_deltas:
+                    for content_part in event.item.content:
+                        if content_part.type == "output_text" and content_part.text:
+                            yield content_part.text
+                streamed_deltas = False
+    else:
+        stream = openai_client.chat.completions.create(
+            model=SERVING_ENDPOINT, messages=messages, max_tokens=max_tokens, temperature=0.7, stream=True
+        )
+        for chunk in stream:
+            for choice in chunk.choices:
+                if choice.delta and choice.delta.content:
+                    yield choice.delta.content
+
+
+def build_recommendations_prompt(student_data: Dict) -> str:
+    """Build the LLM prompt asking for 3 intervention recommendations for a student"""
+    gpa = student_data.get('gpa')
+    return _RECOMMENDATIONS_PROMPT_TEMPLATE.format(
+        full_name=student_data.get('full_name', 'Student'),
+        major=student_data.get('major', 'N/A'),
+        year_level=student_data.get('year_level', 'N/A'),
+        # Two decimals, so float noise in the GPA doesn't defeat the response cache
+        gpa=f"{gpa:.2f}" if isinstance(gpa, (int, float)) else 'N/A',
+        failing_grades=student_data.get('failing_grades', 0),
+        courses_enrolled=student_data.get('courses_enrolled', 0),
+        risk_category=student_data.get('risk_category', 'N/A')
+    )
 
-Student: {student_data.get('full_name', 'Student')} ({student_data.get('major', 'N/A')}, {student_data.get('year_level', 'N/A')})
-GPA: {student_data.get('gpa', 'N/A')} | Failing: {student_data.get('failing_grades', 0)}/{student_data.get('courses_enrolled', 0)} courses | Risk: {student_data.get('risk_category', 'N/A')}
 
-For each recommendation:
-- Choose intervention_type from: Academic Meeting, Study Plan Assignment, Tutoring Referral, Counseling Referral, Financial Aid Consultation, Career Guidance Session, Peer Mentoring Program, Academic Probation Review
-- Choose intervention modality from: In-Person, Virtual, Phone
-- Set priority: High, Medium, or Low
-- Write brief action explaining why this specific student needs this intervention based on the suggested intervention type and modality historical performance data
-- Specify timeline for implementation
-- Define measurable goal specific to this student's situation
-- Add some best practices for each intervention type and modality suggested based on the unstructured best practices documents available. 
+def format_structured_recommendations(recommendations: List[Dict]) -> str:
+    """Format structured recommendations as numbered plain text for display"""
+    formatted_text = ""
+    for i, rec in enumerate(recommendations, 1):
+        if not isinstance(rec, dict):
+            logger.warning(f"Recommendation {i} is not a dict: {type(rec)}")
+            continue
+            
+        formatted_text += f"{i}. {rec.get('intervention_type', 'Unknown')} - Priority: {rec.get('priority', 'Medium')}\n\n"
+        formatted_text += f"Action: {rec.get('action', 'N/A')}\n\n"
+        formatted_text += f"Timeline: {rec.get('timeline', 'N/A')}\n\n"
+        formatted_text += f"Goal: {rec.get('goal', 'N/A')}\n\n"
+        if i < len(recommendations):
+            formatted_text += "\n"
+    return formatted_text.strip()
+
+
+def uses_rules_based_recommendations(student_data: Dict) -> bool:
+    """True for low-risk / excellent students with no failing grades, who skip the LLM"""
+    return (student_data.get('risk_category') in RULES_RISK_CATEGORIES
+            and not student_data.get('failing_grades'))
+
+
+# Standard recommendation templates for rules-based students (no failing grades),
+# keyed by risk_category; {major} is filled per student
+_RULES_RECOMMENDATION_TEMPLATES = {
+    'Excellent': (
+        {
+            "intervention_type": "Career Guidance Session",
+            "priority": "Low",
+            "action": "Strong academic standing; explore internships, research and career paths in {major}.",
+            "timeline": "Within the current semester",
+            "goal": "Identify at least two career or research opportunities to pursue"
+        },
+        {
+            "intervention_type": "Peer Mentoring Program",
+            "priority": "Low",
+            "action": "Invite the student to mentor peers in {major} courses, reinforcing their own learning.",
+            "timeline": "Next mentoring cohort",
+            "goal": "Mentor at least one peer through the semester"
+        },
+        {
+            "intervention_type": "Study Plan Assignment",
+            "priority": "Low",
+            "action": "Keep current study habits documented so performance stays consistent as course load grows.",
+            "timeline": "Within 1 month",
+            "goal": "Maintain current GPA through the end of the academic year"
+        }
+    ),
+    'Low Risk': (
+        {
+            "intervention_type": "Academic Meeting",
+            "priority": "Low",
+            "action": "Brief check-in with the advisor to review progress in {major} and catch issues early.",
+            "timeline": "Within 2 weeks",
+            "goal": "Agree on academic goals for the rest of the semester"
+        },
+        {
+            "intervention_type": "Study Plan Assignment",
+            "priority": "Low",
+            "action": "Set up a weekly study plan to keep all courses on track.",
+            "timeline": "Within 2 weeks",
+            "goal": "Keep every course at a passing grade"
+        },
+        {
+            "intervention_type": "Peer Mentoring Program",
+            "priority": "Low",
+            "action": "Pair the student with a peer mentor in {major} for ongoing support.",
+            "timeline": "Within 1 month",
+            "goal": "Attend at least four mentoring sessions this semester"
+        }
+    ),
+}
+# Display text for each template set, formatted once at import
+_RULES_RECOMMENDATION_TEXT = {
+    key: format_structured_recommendations(list(templates))
+    for key, templates in _RULES_RECOMMENDATION_TEMPLATES.items()
+}
+
+
+def generate_rules_based_recommendations(student_data: Dict) -> Dict[str, any]:
+    """Standard recommendations for low-risk / excellent students, built without calling the LLM"""
+    template_key = 'Excellent' if student_data.get('risk_category') == 'Excellent' else 'Low Risk'
+    placeholders = {'major': student_data.get('major', 'their major')}
+    recommendations = [
+        {**template, "action": template["action"].format(**placeholders)}
+        for template in _RULES_RECOMMENDATION_TEMPLATES[template_key]
+    ]
+    
+    return {
+        "llm_recommendations": _RULES_RECOMMENDATION_TEXT[template_key].format(**placeholders),
+        "structured_recommendations": recommendations,
+        "thinking_process": [],
+        "tool_calls": [],
+        "all_messages": [],
+        "student_context": student_data,
+        "generated_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds'),
+        "source": "rules"
+    }
 
-Respond with a JSON object containing an array of 3 recommendations and the information above.
-"""
 
+def generate_intervention_recommendations(student_data: Dict, force_llm: bool = False) -> Dict[str, any]:
+    """Generate intelligent intervention recommendations using LLM with structured output"""
+    
+    # Low-risk students get standard recommendations without an endpoint round-trip
+    if not force_llm and uses_rules_based_recommendations(student_data):
+        return generate_rules_based_recommendations(student_data)
+    
+    prompt = build_recommendations_prompt(student_data)
+    
     # Call the LLM with structured output
-    llm_response = call_databricks_serving_endpoint(prompt, max_tokens=800, response_format=response_format)
+    llm_response = cached_call_databricks_serving_endpoint(prompt, max_tokens=800, response_format=INTERVENTION_RESPONSE_FORMAT)
     
     # Check if response is valid
     if not llm_response or not isinstance(llm_response, dict):
@@ -786,7 +1239,7 @@ Respond with a JSON object containing an array of 3 recommendations and the info
             "thinking_process": [],
             "tool_calls": [],
             "student_context": student_data,
-            "generated_at": pd.Timestamp.now().isoformat(),
+            "generated_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds'),
             "source": "llm_unavailable"
         }
     
@@ -804,13 +1257,12 @@ Respond with a JSON object containing an array of 3 recommendations and the info
             "thinking_process": thinking_process,
             "tool_calls": tool_calls,
             "student_context": student_data,
-            "generated_at": pd.Timestamp.now().isoformat(),
+            "generated_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds'),
             "source": "llm_empty_response"
         }
     
     try:
         # Parse the structured JSON response
-        import json
         structured_data = json.loads(response_content)
         
         # Handle both dict and list formats
@@ -828,27 +1280,13 @@ Respond with a JSON object containing an array of 3 recommendations and the info
             logger.warning(f"No valid recommendations found: {recommendations}")
             raise ValueError("No valid recommendations in response")
         
-        # Format the structured data for display
-        formatted_text = ""
-        for i, rec in enumerate(recommendations, 1):
-            if not isinstance(rec, dict):
-                logger.warning(f"Recommendation {i} is not a dict: {type(rec)}")
-                continue
-                
-            formatted_text += f"{i}. {rec.get('intervention_type', 'Unknown')} - Priority: {rec.get('priority', 'Medium')}\n\n"
-            formatted_text += f"Action: {rec.get('action', 'N/A')}\n\n"
-            formatted_text += f"Timeline: {rec.get('timeline', 'N/A')}\n\n"
-            formatted_text += f"Goal: {rec.get('goal', 'N/A')}\n\n"
-            if i < len(recommendations):
-                formatted_text += "\n"
-        
         return {
-            "llm_recommendations": formatted_text.strip(),
+            "llm_recommendations": format_structured_recommendations(recommendations),
             "structured_recommendations": recommendations,
             "thinking_process": thinking_process,
             "tool_calls": tool_calls,
             "student_context": student_data,
-            "generated_at": pd.Timestamp.now().isoformat(),
+            "generated_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds'),
             "source": "multi_agent_supervisor_structured"
         }
         
@@ -864,15 +1302,15 @@ Respond with a JSON object containing an array of 3 recommendations and the info
             "thinking_process": thinking_process,
             "tool_calls": tool_calls,
             "student_context": student_data,
-            "generated_at": pd.Timestamp.now().isoformat(),
+            "generated_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds'),
             "source": "multi_agent_supervisor_fallback"
         }
 
 
-def generate_personalized_intervention_details(intervention_type: str, student_data: Dict, priority: str) -> str:
-    """Generate personalized intervention details using LLM"""
+def build_intervention_details_prompt(intervention_type: str, student_data: Dict, priority: str) -> str:
+    """Build the LLM prompt for a personalized intervention action plan"""
     
-    prompt = f"""
+    return f"""
 Create a specific action plan for this intervention. Be direct and practical.
 
 Student: {student_data.get('full_name', 'N/A')} ({student_data.get('major', 'N/A')}, {student_data.get('year_level', 'N/A')})
@@ -909,8 +1347,9 @@ Develop and implement [specific goal with measurable outcome]
 Keep it concise and actionable. Use simple bullet points only.
 """
 
-    llm_response = call_databricks_serving_endpoint(prompt, max_tokens=600)
-    
+
+def format_intervention_details_response(llm_response: Optional[Dict], intervention_type: str, priority: str) -> str:
+    """Turn an endpoint response into intervention details text, with a fallback message"""
     if llm_response and isinstance(llm_response, dict):
         # Extract content from response
         response_content = llm_response.get('content', '')
@@ -918,7 +1357,37 @@ Keep it concise and actionable. Use simple bullet points only.
             return f"Priority: {priority}\n\n{response_content}"
     
     # Fallback if no valid response
-        return f"Priority: {priority}\n\nAI intervention details are currently unavailable. Please provide manual details for this {intervention_type}."
+    return f"Priority: {priority}\n\nAI intervention details are currently unavailable. Please provide manual details for this {intervention_type}."
+
+
+def generate_personalized_intervention_details(intervention_type: str, student_data: Dict, priority: str) -> str:
+    """Generate personalized intervention details using LLM"""
+    prompt = build_intervention_details_prompt(intervention_type, student_data, priority)
+    llm_response = cached_call_databricks_serving_endpoint(prompt, max_tokens=600)
+    return format_intervention_details_response(llm_response, intervention_type, priority)
+
+
+def generate_personalized_intervention_details_streaming(intervention_type: str, student_data: Dict, priority: str) -> str:
+    """Generate personalized intervention details, writing the text to the page as it streams
+    
+    The stream runs as the current user with the blocking call's max_tokens, so both
+    share one per-user response-cache entry. A cached response is returned without
+    streaming. If streaming fails the blocking call is used instead.
+    """
+    prompt = build_intervention_details_prompt(intervention_type, student_data, priority)
+    cache_key = get_llm_cache_key(prompt, 600)
+    llm_response = get_cached_llm_response(cache_key)
+    if llm_response is None and SERVING_ENDPOINT:
+        try:
+            streamed_text = st.write_stream(stream_serving_endpoint_text(prompt, max_tokens=600))
+            if isinstance(streamed_text, str):
+                llm_response = {'content': parse_agent_tags(streamed_text)['cleaned_content']}
+                store_llm_response(cache_key, llm_response)
+        except Exception as e:
+            logger.warning(f"Streaming intervention details failed, falling back to a blocking call: {str(e)}")
+    if llm_response is None:
+        llm_response = cached_call_databricks_serving_endpoint(prompt, max_tokens=600)
+    return format_intervention_details_response(llm_response, intervention_type, priority)
 
 def parse_ai_recommendations(recommendations_data: Dict) -> Dict:
     """Parse AI recommendations data and extract structured data for form population"""
@@ -946,44 +1415,24 @@ def parse_ai_recommendations(recommendations_data: Dict) -> Dict:
         # Fallback: parse from text format (legacy support)
         ai_text = recommendations_data.get('llm_recommendations', '')
         recommendations = []
-        lines = ai_text.split('\n')
         current_rec = {}
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Look for numbered recommendations (1., 2., 3.)
-            if line.startswith(('1.', '2.', '3.')):
-                # Save previous recommendation if exists
+        for match in _LEGACY_REC_LINE_RE.finditer(ai_text):
+            header = match.group('header')
+            if header is not None:
+                # Numbered recommendation (1., 2., 3.) starts a new entry
                 if current_rec:
                     recommendations.append(current_rec)
-                
-                # Parse intervention type and priority
                 current_rec = {}
-                if ' - Priority:' in line or ' - [Priority:' in line:
-                    parts = line.split(' - ')
-                    if len(parts) >= 2:
-                        # Extract intervention type (remove number)
-                        intervention_part = parts[0].split('.', 1)[1].strip()
-                        current_rec['intervention_type'] = intervention_part.strip('[]')
-                        
-                        # Extract priority
-                        priority_part = parts[1].replace('Priority:', '').replace('[Priority:', '').strip('[]')
-                        current_rec['priority'] = priority_part.split(']')[0].strip()
-            
-            # Look for action items
-            elif line.startswith('Action:'):
-                current_rec['action'] = line.replace('Action:', '').strip()
-            
-            # Look for timeline
-            elif line.startswith('Timeline:'):
-                current_rec['timeline'] = line.replace('Timeline:', '').strip()
                 
-            # Look for goals/objectives
-            elif line.startswith(('Goal:', 'Objective:')):
-                current_rec['goal'] = line.replace('Goal:', '').replace('Objective:', '').strip()
+                # Parse intervention type and priority
+                header_match = _LEGACY_REC_HEADER_RE.match(header.strip())
+                if header_match:
+                    current_rec['intervention_type'] = header_match.group('type').strip().strip('[]')
+                    current_rec['priority'] = header_match.group('priority').strip()
+            else:
+                # Action / Timeline / Goal (or Objective) line
+                current_rec[_LEGACY_FIELD_KEYS[match.group('field')]] = match.group('value').strip()
         
         # Add the last recommendation
         if current_rec:
@@ -1000,26 +1449,15 @@ def parse_ai_recommendations(recommendations_data: Dict) -> Dict:
 
 def generate_meeting_details_from_ai(recommendation: Dict, student_data: Dict) -> Dict:
     """Generate meeting details based on AI recommendation and student context"""
-    import datetime
-    
-    details = {}
-    
-    # Determine meeting type based on intervention and priority
-    if recommendation.get('priority', '').lower() == 'high':
-        details['meeting_type'] = 'In-Person'
-        # Schedule within 48 hours for high priority
-        details['meeting_date'] = datetime.date.today() + datetime.timedelta(days=1)
-        details['meeting_time'] = datetime.time(10, 0)  # 10:00 AM
-    elif recommendation.get('priority', '').lower() == 'medium':
-        details['meeting_type'] = 'Virtual'
-        # Schedule within 1 week for medium priority
-        details['meeting_date'] = datetime.date.today() + datetime.timedelta(days=3)
-        details['meeting_time'] = datetime.time(14, 0)  # 2:00 PM
-    else:
-        details['meeting_type'] = 'Virtual'
-        # Schedule within 2 weeks for low priority
-        details['meeting_date'] = datetime.date.today() + datetime.timedelta(days=7)
-        details['meeting_time'] = datetime.time(15, 0)  # 3:00 PM
+    # Determine meeting type, date and time based on priority
+    meeting_type, delta_days, meeting_time = _MEETING_SCHEDULE_BY_PRIORITY.get(
+        recommendation.get('priority', '').lower(), _DEFAULT_MEETING_SCHEDULE
+    )
+    details = {
+        'meeting_type': meeting_type,
+        'meeting_date': _dt.date.today() + _dt.timedelta(days=delta_days),
+        'meeting_time': meeting_time
+    }
     
     # Generate agenda based on AI recommendation and student context
     agenda_items = []
@@ -1057,44 +1495,122 @@ def generate_meeting_details_from_ai(recommendation: Dict, student_data: Dict) -
 # Student Risk Management Functions
 
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_student_risk_data():
-    """Load student risk data from database"""
+_COPY_CSV_SQL = sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT CSV, HEADER)")
+
+# Student risk query, composed once with the table name quoted as an identifier
+_STUDENT_RISK_QUERY = sql.SQL("""
+    SELECT 
+        student_id,
+        full_name,
+        major,
+        year_level,
+        gpa,
+        courses_enrolled,
+        failing_grades,
+        risk_category
+    FROM {table}
+""").format(table=sql.Identifier(DATABASE_REMEDIATION_DATA, 'public', 'student_risk_analysis_gold'))
+
+
+class _CopyStream(io.RawIOBase):
+    """Read-only file object over the chunks of a psycopg COPY TO STDOUT"""
+
+    def __init__(self, copy):
+        self._chunks = iter(copy)
+        self._pending = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        # Advance through the chunk without copying the unread remainder
+        self._pending = self._pending[size:]
+        return size
+
+
+def read_sql_dataframe(conn, query, **read_csv_kwargs):
+    """Run a query (str or psycopg.sql Composable) through COPY ... TO STDOUT and parse it with the pandas C CSV reader.
+
+    This avoids building a Python tuple per row the way pd.read_sql_query does, and
+    the CSV is parsed as it streams in rather than after the whole result is buffered.
+    """
+    with conn.cursor() as cur:
+        if isinstance(query, str):
+            query = sql.SQL(query)
+        with cur.copy(_COPY_CSV_SQL.format(query)) as copy:
+            return pd.read_csv(io.BufferedReader(_CopyStream(copy)), **read_csv_kwargs)
+
+
+@st.cache_data(ttl=60, show_spinner="Loading student data...")
+def load_student_risk_data(user_email):
+    """Load student risk data from database, ordered by risk level, failing grades and GPA
+    
+    ``user_email`` only keys the cache: queries run as the user, so results are
+    never shared between users.
+    """
     with get_connection(DATABASE_REMEDIATION_DATA) as conn:
-        query = f"""
-        SELECT 
-            student_id,
-            full_name,
-            major,
-            year_level,
-            gpa,
-            courses_enrolled,
-            failing_grades,
-            risk_category,
-            activity_status
-        FROM {DATABASE_REMEDIATION_DATA}.public.student_risk_analysis_gold
-        ORDER BY 
-            CASE 
-                WHEN risk_category = 'High Risk' THEN 1
-                WHEN risk_category = 'Medium Risk' THEN 2
-                WHEN risk_category = 'Low Risk' THEN 3
-                WHEN risk_category = 'Excellent' THEN 4
-                ELSE 5
-            END,
-            failing_grades DESC,
-            gpa ASC
-        """
-        
         try:
-            df = pd.read_sql_query(query, conn)
-            return df
+            # Low-cardinality columns are parsed straight into categoricals
+            df = read_sql_dataframe(conn, _STUDENT_RISK_QUERY, dtype={
+                'student_id': str,
+                'full_name': str,
+                'major': 'category',
+                'year_level': 'category',
+                'risk_category': 'category'
+            })
+
+            # Ordered categorical replaces the server-side ORDER BY CASE, so sorts and
+            # filters compare small integer codes; any unexpected categories sort after
+            # the known ones
+            extra_categories = sorted(set(df['risk_category'].cat.categories) - set(RISK_CATEGORY_ORDER))
+            df['risk_category'] = df['risk_category'].cat.set_categories(
+                [*RISK_CATEGORY_ORDER, *extra_categories],
+                ordered=True
+            )
+            return df.sort_values(
+                ['risk_category', 'failing_grades', 'gpa'],
+                ascending=[True, False, True],
+                ignore_index=True
+            )
         except Exception as e:
             st.error(f"Error loading student data: {str(e)}")
             st.info(f"Please check that the '{DATABASE_REMEDIATION_DATA}.public.student_risk_analysis_gold' table exists and you have proper permissions.")
             return pd.DataFrame()
 
-def list_available_tables():
-    """List available tables in public schema for debugging purposes"""
+@st.cache_data(ttl=60, show_spinner=False)
+def load_risk_counts(user_email):
+    """(risk_category, count) pairs for every risk category, zero counts included"""
+    df = load_student_risk_data(user_email)
+    return tuple((str(category), int(count)) for category, count in df['risk_category'].value_counts().items())
+
+@st.cache_data(ttl=60, show_spinner=False)
+def filter_student_risk_data(user_email, filters):
+    """Students matching every (column, selected values) pair in ``filters``
+    
+    Cached per user and filter combination, so switching back to a recent
+    combination skips the isin scans.
+    """
+    df = load_student_risk_data(user_email)
+    for column, selected in filters:
+        df = df[df[column].isin(selected)]
+    return df
+
+def clear_student_risk_caches():
+    """Drop the cached student data and everything derived from it"""
+    load_student_risk_data.clear()
+    load_risk_counts.clear()
+    filter_student_risk_data.clear()
+
+@st.cache_data(ttl=3600, show_spinner=False)  # Schema rarely changes
+def list_available_tables() -> List[Dict]:
+    """List available tables in public schema for debugging purposes (a handful of rows, no DataFrame)"""
     with get_connection(DATABASE_REMEDIATION_DATA) as conn:
         try:
             # Query to list tables in public schema
@@ -1105,68 +1621,169 @@ def list_available_tables():
             AND (tablename LIKE '%student%' OR tablename LIKE '%risk%')
             ORDER BY tablename
             """
-            df = pd.read_sql_query(query, conn)
-            return df
+            with conn.cursor(row_factory=dict_row) as cur:
+                return cur.execute(query).fetchall()
         except Exception as e:
             st.error(f"Error listing tables: {str(e)}")
-            return pd.DataFrame()
+            return []
 
 
 
-def submit_intervention(student_id, intervention_type, details, created_by):
+# Intervention statements, kept as constants so prepared statements are reused
+_CREATE_INTERVENTIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS public.student_interventions (
+        student_id VARCHAR(255),
+        intervention_type VARCHAR(255),
+        intervention_details TEXT,
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status VARCHAR(50) DEFAULT 'Pending',
+        created_by VARCHAR(255),
+        priority SMALLINT NOT NULL DEFAULT 4,
+        PRIMARY KEY (student_id, created_date)
+    )
+"""
+
+# Tables created before the priority column existed only get the column added here: a
+# catalog-only change, since inserts need it. Backfilling and tightening it scan and lock
+# the table, so the owner runs those from the README migration instead of a user's submit.
+# One probe answers both "does the table exist" and "does it have priority yet".
+_INTERVENTIONS_SCHEMA_STATE_SQL = """
+    SELECT
+        to_regclass('public.student_interventions') IS NOT NULL,
+        EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'student_interventions' AND column_name = 'priority'
+        )
+"""
+_ADD_PRIORITY_COLUMN_SQL = "ALTER TABLE public.student_interventions ADD COLUMN IF NOT EXISTS priority SMALLINT"
+# Partial index matching load_scheduled_remediations' WHERE + ORDER BY, built together
+# with a new (empty) table; existing tables get it CONCURRENTLY from the README migration
+_PENDING_SORT_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_interventions_pending_sort
+    ON public.student_interventions (priority, created_date DESC)
+    WHERE status = 'Pending'
+"""
+# NULL when the index is missing, false while a concurrent build is running or after one
+# was interrupted
+_PENDING_SORT_INDEX_VALID_SQL = """
+    SELECT indisvalid FROM pg_index
+    WHERE indexrelid = to_regclass('public.idx_interventions_pending_sort')
+"""
+
+# Interventions are scheduling records, so losing the last few inserts on a server crash
+# is acceptable; scoped with SET LOCAL so the pooled connection keeps synchronous commits
+_ASYNC_COMMIT_SQL = "SET LOCAL synchronous_commit = OFF"
+# clock_timestamp() rather than the column default (transaction time) keeps
+# created_date, part of the primary key, distinct for rows inserted in one batch
+_INSERT_INTERVENTION_SQL = """
+    INSERT INTO public.student_interventions
+    (student_id, intervention_type, intervention_details, created_by, priority, created_date)
+    VALUES (%s, %s, %s, %s, %s, clock_timestamp())
+"""
+# Matches on the primary key (student_id, created_date); an intervention already
+# completed elsewhere is left untouched instead of rewritten with the same status
+_COMPLETE_INTERVENTION_SQL = """
+    UPDATE public.student_interventions
+    SET status = 'Completed'
+    WHERE student_id = %s AND created_date = %s AND status = 'Pending'
+"""
+
+# Stored priority rank: sorts High, Medium, Low, then anything else
+_PRIORITY_RANK = {'High': 1, 'Medium': 2, 'Low': 3}
+_OTHER_PRIORITY_RANK = 4
+_PRIORITY_BY_RANK = {rank: priority for priority, rank in _PRIORITY_RANK.items()}
+
+
+@st.cache_resource(show_spinner=False)
+def ensure_intervention_schema(dbname):
+    """Create the interventions table or add its priority column; runs once per process and database
+    
+    Only called from the write path, never while loading pages, and only does what the
+    insert needs, so any failure is raised and nothing is cached until it succeeds. The
+    priority backfill, its NOT NULL constraint and the sort index on an existing table
+    lock or scan the table and need ownership, so they are left to the README migration;
+    a missing or invalid index is only logged.
+    """
+    with get_connection(dbname) as conn:
+        table_exists, has_priority = conn.execute(_INTERVENTIONS_SCHEMA_STATE_SQL).fetchone()
+        if not table_exists:
+            logger.info("Creating student_interventions")
+            conn.execute(_CREATE_INTERVENTIONS_TABLE_SQL)
+            conn.execute(_PENDING_SORT_INDEX_SQL)
+            return True
+        if not has_priority:
+            logger.info("Adding student_interventions.priority")
+            conn.execute(_ADD_PRIORITY_COLUMN_SQL)
+        
+        index_row = conn.execute(_PENDING_SORT_INDEX_VALID_SQL).fetchone()
+        if index_row is None:
+            logger.warning("idx_interventions_pending_sort is missing; create it with the README migration")
+        elif not index_row[0]:
+            # Another process may still be building it, so it is never dropped from here;
+            # an index left invalid by an interrupted build is rebuilt by the owner (see README)
+            logger.warning("idx_interventions_pending_sort is not valid yet; rebuild it if no build is running")
+    return True
+
+
+def submit_intervention(student_id, intervention_type, details, created_by, priority=None):
     """Submit intervention to database"""
+    submit_interventions([(student_id, intervention_type, details, created_by, priority)])
+
+
+def submit_interventions(interventions):
+    """Insert several interventions in one transaction
+    
+    ``interventions`` holds (student_id, intervention_type, details, created_by, priority)
+    tuples. psycopg's executemany pipelines the inserts, so the batch costs about one
+    network round-trip rather than one per row.
+    """
+    ensure_intervention_schema(DATABASE_REMEDIATION_DATA)
+    rows = [
+        (student_id, intervention_type, details, created_by, _PRIORITY_RANK.get(priority, _OTHER_PRIORITY_RANK))
+        for student_id, intervention_type, details, created_by, priority in interventions
+    ]
     with get_connection(DATABASE_REMEDIATION_DATA) as conn:
         with conn.cursor() as cur:
-            # First ensure the table exists
-            create_table_query = """
-            CREATE TABLE IF NOT EXISTS public.student_interventions (
-                student_id VARCHAR(255),
-                intervention_type VARCHAR(255),
-                intervention_details TEXT,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status VARCHAR(50) DEFAULT 'Pending',
-                created_by VARCHAR(255),
-                PRIMARY KEY (student_id, created_date)
-            )
-            """
-            
-            insert_query = """
-            INSERT INTO public.student_interventions
-            (student_id, intervention_type, intervention_details, created_by)
-            VALUES (%s, %s, %s, %s)
-            """
-            
             try:
-                # Create table if it doesn't exist
-                cur.execute(create_table_query)
-                # Insert the intervention
-                cur.execute(insert_query, (student_id, intervention_type, details, created_by))
+                # Don't wait for the WAL flush on commit
+                cur.execute(_ASYNC_COMMIT_SQL)
+                # Insert the interventions; a single submission, the usual case from the
+                # Create page, is prepared on first use rather than at the pool's threshold
+                if len(rows) == 1:
+                    cur.execute(_INSERT_INTERVENTION_SQL, rows[0], prepare=True)
+                else:
+                    cur.executemany(_INSERT_INTERVENTION_SQL, rows)
                 conn.commit()
             except Exception as e:
                 st.error(f"Error submitting intervention: {str(e)}")
                 raise e
+    # Invalidate the cached pending list here, so callers can't forget to
+    load_scheduled_remediations.clear()
+
+def complete_interventions(intervention_keys):
+    """Mark several interventions as completed in one transaction
+    
+    ``intervention_keys`` holds (student_id, created_date) primary keys, so each
+    UPDATE is a single index lookup, and executemany pipelines them in about one
+    round-trip.
+    """
+    with get_connection(DATABASE_REMEDIATION_DATA) as conn:
+        with conn.cursor() as cur:
+            cur.executemany(_COMPLETE_INTERVENTION_SQL, list(intervention_keys))
+        conn.commit()
+    load_scheduled_remediations.clear()
 
 def get_risk_color(risk_category):
     """Return color based on risk category"""
-    colors = {
-        'High Risk': '#FF4B4B',
-        'Medium Risk': '#FFA500', 
-        'Low Risk': '#00CC88',
-        'Excellent': '#28A745'
-    }
-    return colors.get(risk_category, '#808080')
-
-def get_priority_color(priority):
-    """Return color based on intervention priority"""
-    colors = {
-        'High': '#FF4B4B',
-        'Medium': '#FFA500',
-        'Low': '#00CC88'
-    }
-    return colors.get(priority, '#808080')
+    return RISK_COLORS.get(risk_category, DEFAULT_COLOR)
 
-def load_scheduled_remediations():
-    """Load scheduled remediations from database"""
+@st.cache_data(ttl=60, show_spinner="Loading scheduled remediations...")
+def load_scheduled_remediations(user_email):
+    """Load scheduled remediations from database (cached per user; cleared on submit / complete)
+    
+    Read-only: the table is created and migrated by the write path, so opening the
+    page never runs DDL as the viewing user.
+    """
     with get_connection(DATABASE_REMEDIATION_DATA) as conn:
         query = """
         SELECT 
@@ -1175,22 +1792,52 @@ def load_scheduled_remediations():
             intervention_details,
             created_date,
             status,
-            created_by
+            created_by,
+            priority
         FROM public.student_interventions
         WHERE status = 'Pending'
-        ORDER BY 
-            CASE 
-                WHEN intervention_details LIKE '%Priority: High%' THEN 1
-                WHEN intervention_details LIKE '%Priority: Medium%' THEN 2
-                WHEN intervention_details LIKE '%Priority: Low%' THEN 3
-                ELSE 4
-            END,
-            created_date DESC
+        ORDER BY priority, created_date DESC
         """
         
         try:
-            df = pd.read_sql_query(query, conn)
+            df = read_sql_dataframe(conn, query, parse_dates=['created_date'], dtype={
+                'student_id': str,
+                'intervention_type': str,
+                'intervention_details': str,
+                'status': str,
+                'created_by': str
+            })
+            # With no pending rows read_csv leaves created_date as object dtype, so skip
+            # the derived columns (the page only needs df.empty then)
+            if df.empty:
+                return df
+            # Format timestamps for display in one vectorized pass
+            df['created_str'] = df['created_date'].dt.strftime('%Y-%m-%d %H:%M')
+            # Priority label from the stored rank, NaN for interventions without one
+            df['priority_label'] = pd.Categorical(
+                df['priority'].map(_PRIORITY_BY_RANK), categories=PRIORITY_OPTIONS
+            )
+            # Card markup built once per cache fill; cards without a stated priority
+            # are shown as Medium, so every label has an entry in PRIORITY_COLORS
+            df['card_html'] = [
+                _REMEDIATION_CARD_HTML.format(
+                    color=PRIORITY_COLORS[priority],
+                    intervention_type=intervention_type,
+                    student_id=student_id,
+                    priority=priority,
+                    created=created,
+                    created_by=created_by,
+                    status=status
+                )
+                for priority, intervention_type, student_id, created, created_by, status in zip(
+                    df['priority_label'].fillna("Medium"), df['intervention_type'], df['student_id'],
+                    df['created_str'], df['created_by'], df['status']
+                )
+            ]
             return df
+        except pg_errors.UndefinedTable:
+            # Nothing has been submitted yet; the table is created on the first write
+            return pd.DataFrame()
         except Exception as e:
             st.error(f"Error loading scheduled remediations: {str(e)}")
             return pd.DataFrame()
@@ -1245,9 +1892,8 @@ def main():
                 pass  # Already on this page
         else:
             # Other pages - use secondary button style
-            if st.sidebar.button(f"{icon} {page_name}", key=f"nav_{page_name}", use_container_width=True):
-                st.session_state.page = page_name
-                st.rerun()
+            st.sidebar.button(f"{icon} {page_name}", key=f"nav_{page_name}", use_container_width=True,
+                              on_click=set_session_values, kwargs={'page': page_name})
     
     # Get current page for the main content
     page = st.session_state.page
@@ -1261,143 +1907,189 @@ def main():
     elif page == "Scheduled Remediations":
         show_scheduled_remediations()
 
+@st.cache_data(show_spinner=False)
+def build_risk_distribution_chart(risk_counts):
+    """Build the risk distribution pie from (category, count) pairs; rebuilt only when counts change"""
+    # Imported here so pages without charts don't pay plotly's import cost
+    import plotly.express as px
+    categories = [category for category, _ in risk_counts]
+    return px.pie(values=[count for _, count in risk_counts], names=categories, color=categories,
+                  color_discrete_map={
+                      'High Risk': 'red',
+                      'Medium Risk': 'orange',
+                      'Low Risk': 'yellow',
+                      'Excellent': 'green'
+                  })
+
+
+@st.fragment
+def show_debug_tools():
+    """Sidebar debug panel
+    
+    Runs as a fragment so the connection / endpoint test buttons only rerun this
+    panel instead of reloading the whole dashboard.
+    """
+    st.subheader("Debug Information")
+    try:
+        user_email, user_token = get_user_credentials()
+        st.write(f"**User Email:** {user_email}")
+        st.write(f"**Database:** {DATABASE_REMEDIATION_DATA}")
+        st.write(f"**Schema:** public")
+        st.write(f"**Auth Method:** User Authorization")
+        st.write(f"**DB Host:** {os.getenv('PGHOST')}")
+        st.write(f"**DB Port:** {os.getenv('PGPORT')}")
+        st.write(f"**App Name:** {os.getenv('PGAPPNAME')}")
+        
+        st.markdown("**LLM Configuration:**")
+        st.write(f"**Serving Endpoint:** {SERVING_ENDPOINT or 'Not configured'}")
+        st.write(f"**Model Type:** Multi-Agent-Supervisor (MAS)")
+        st.write(f"**Agent Capabilities:** Genie (data retrieval), KA endpoint (knowledge augmentation)")
+        st.write(f"**Client Type:** Databricks SDK (serving_endpoints.query)")
+        st.write(f"**Authentication:** On-Behalf-Of (OBO) with ModelServingUserCredentials")
+        st.write(f"**API Format:** dataframe_records with input/max_output_tokens")
+        st.write(f"**Features:** Multi-agent orchestration, tool calling, data-grounded responses")
+        st.info("ℹ️ Using OBO authentication automatically handles user permissions for the serving endpoint.")
+        
+        if st.button("Test MAS Endpoint"):
+            if SERVING_ENDPOINT:
+                with st.spinner("Testing Multi-Agent-Supervisor endpoint with OBO authentication..."):
+                    test_response = call_databricks_serving_endpoint("Hello, this is a test.", max_tokens=50)
+                    if test_response:
+                        st.success("✅ Multi-Agent-Supervisor endpoint is working!")
+                        if isinstance(test_response, dict):
+                            st.write(f"**Test Response:** {test_response.get('content', str(test_response))}")
+                        else:
+                            st.write(f"**Test Response:** {test_response}")
+                    else:
+                        st.error("❌ MAS endpoint test failed - check permissions or endpoint configuration")
+            else:
+                st.error("❌ Serving endpoint not configured")
+        
+        if st.button("Test Connection"):
+            with st.spinner("Testing connection..."):
+                try:
+                    with get_connection(DATABASE_REMEDIATION_DATA) as conn:
+                        with conn.cursor() as cur:
+                            cur.execute("SELECT current_user, session_user, version()")
+                            current_user, session_user, version = cur.fetchone()
+                            st.success("✅ Connection successful!")
+                            st.write(f"**Current User:** {current_user}")
+                            st.write(f"**Session User:** {session_user}")
+                            st.write(f"**PostgreSQL Version:** {version}")
+                except Exception as conn_e:
+                    st.error(f"Connection test failed: {str(conn_e)}")
+        
+        if st.button("List Available Tables"):
+            with st.spinner("Listing tables..."):
+                tables = list_available_tables()
+                if tables:
+                    st.write("**Available Tables in Public Schema:**")
+                    st.dataframe(tables)
+                else:
+                    st.write("No student/risk tables found in public schema")
+    except Exception as e:
+        st.error(f"Debug info error: {str(e)}")
+
+
 def show_student_dashboard():
     st.header("📊 Students at Risk Overview")
     
     # Add debug section in sidebar
     with st.sidebar:
+        if st.button("🔄 Refresh Student Data", use_container_width=True, help="Reload student data from the database"):
+            clear_student_risk_caches()
+        
         if st.checkbox("🔧 Debug Mode"):
-            st.subheader("Debug Information")
-            try:
-                user_email, user_token = get_user_credentials()
-                st.write(f"**User Email:** {user_email}")
-                st.write(f"**Database:** {DATABASE_REMEDIATION_DATA}")
-                st.write(f"**Schema:** public")
-                st.write(f"**Auth Method:** User Authorization")
-                st.write(f"**DB Host:** {os.getenv('PGHOST')}")
-                st.write(f"**DB Port:** {os.getenv('PGPORT')}")
-                st.write(f"**App Name:** {os.getenv('PGAPPNAME')}")
-                
-                st.markdown("**LLM Configuration:**")
-                st.write(f"**Serving Endpoint:** {SERVING_ENDPOINT or 'Not configured'}")
-                st.write(f"**Model Type:** Multi-Agent-Supervisor (MAS)")
-                st.write(f"**Agent Capabilities:** Genie (data retrieval), KA endpoint (knowledge augmentation)")
-                st.write(f"**Client Type:** Databricks SDK (serving_endpoints.query)")
-                st.write(f"**Authentication:** On-Behalf-Of (OBO) with ModelServingUserCredentials")
-                st.write(f"**API Format:** dataframe_records with input/max_output_tokens")
-                st.write(f"**Features:** Multi-agent orchestration, tool calling, data-grounded responses")
-                st.info("ℹ️ Using OBO authentication automatically handles user permissions for the serving endpoint.")
-                
-                if st.button("Test MAS Endpoint"):
-                    if SERVING_ENDPOINT:
-                        with st.spinner("Testing Multi-Agent-Supervisor endpoint with OBO authentication..."):
-                            test_response = call_databricks_serving_endpoint("Hello, this is a test.", max_tokens=50)
-                            if test_response:
-                                st.success("✅ Multi-Agent-Supervisor endpoint is working!")
-                                if isinstance(test_response, dict):
-                                    st.write(f"**Test Response:** {test_response.get('content', str(test_response))}")
-                                else:
-                                    st.write(f"**Test Response:** {test_response}")
-                            else:
-                                st.error("❌ MAS endpoint test failed - check permissions or endpoint configuration")
-                    else:
-                        st.error("❌ Serving endpoint not configured")
-                
-                if st.button("Test Connection"):
-                    with st.spinner("Testing connection..."):
-                        try:
-                            with get_connection(DATABASE_REMEDIATION_DATA) as conn:
-                                with conn.cursor() as cur:
-                                    cur.execute("SELECT current_user, session_user, version()")
-                                    current_user, session_user, version = cur.fetchone()
-                                    st.success("✅ Connection successful!")
-                                    st.write(f"**Current User:** {current_user}")
-                                    st.write(f"**Session User:** {session_user}")
-                                    st.write(f"**PostgreSQL Version:** {version}")
-                        except Exception as conn_e:
-                            st.error(f"Connection test failed: {str(conn_e)}")
-                
-                if st.button("List Available Tables"):
-                    with st.spinner("Listing tables..."):
-                        tables_df = list_available_tables()
-                        if not tables_df.empty:
-                            st.write("**Available Tables in Public Schema:**")
-                            st.dataframe(tables_df)
-                        else:
-                            st.write("No student/risk tables found in public schema")
-            except Exception as e:
-                st.error(f"Debug info error: {str(e)}")
+            show_debug_tools()
     
     try:
-        # Load data
-        with st.spinner("Loading student data..."):
-            df = load_student_risk_data()
+        # Load data (the cache shows a spinner only on a miss)
+        user_email, _ = get_user_credentials()
+        df = load_student_risk_data(user_email)
         
         if df.empty:
             st.warning("No student data found.")
             st.info("💡 Try enabling Debug Mode in the sidebar to see available tables.")
             return
         
-        # Summary metrics
-        col1, col2, col3, col4, col5 = st.columns(5)
+        # Summary metrics (cached counts feed the metrics and the chart)
+        risk_count_pairs = load_risk_counts(user_email)
+        risk_counts = dict(risk_count_pairs)
+        total_students = len(df)
         
-        with col1:
-            total_students = len(df)
-            st.metric("Total Students", total_students)
+        total_col, *category_cols, gpa_col = st.columns(2 + len(_SUMMARY_RISK_CATEGORIES))
         
-        with col2:
-            high_risk = len(df[df['risk_category'] == 'High Risk'])
-            st.metric("High Risk", high_risk, delta=f"{high_risk/total_students*100:.1f}%")
-        
-        with col3:
-            medium_risk = len(df[df['risk_category'] == 'Medium Risk'])
-            st.metric("Medium Risk", medium_risk, delta=f"{medium_risk/total_students*100:.1f}%")
+        with total_col:
+            st.metric("Total Students", total_students)
         
-        with col4:
-            excellent = len(df[df['risk_category'] == 'Excellent'])
-            st.metric("Excellent", excellent, delta=f"{excellent/total_students*100:.1f}%")
+        percent_per_student = 100.0 / total_students
+        for category_col, category in zip(category_cols, _SUMMARY_RISK_CATEGORIES):
+            with category_col:
+                count = risk_counts.get(category, 0)
+                st.metric(category, count, delta=f"{count * percent_per_student:.1f}%")
         
-        with col5:
+        with gpa_col:
             avg_gpa = df['gpa'].mean()
             st.metric("Average GPA", f"{avg_gpa:.2f}")
         
         # Risk distribution chart
         st.subheader("Risk Category Distribution")
-        risk_counts = df['risk_category'].value_counts()
-        fig = px.pie(values=risk_counts.values, names=risk_counts.index, 
-                    color_discrete_map={
-                        'High Risk': 'red',
-                        'Medium Risk': 'orange',
-                        'Low Risk': 'yellow',
-                        'Excellent': 'green'
-                    })
-        st.plotly_chart(fig, use_container_width=True)
+        fig = build_risk_distribution_chart(risk_count_pairs)
+        st.plotly_chart(fig, use_container_width=True, key="risk_pie")
         
+        # Filters, sorting and student table
+        show_student_list(df)
+        
+    except Exception as e:
+        st.error(f"Error loading data: {str(e)}")
+        st.info("Please check your database connection and credentials.")
+
+@st.fragment
+def show_student_list(df):
+    """Filters, sorting and student table for the dashboard
+    
+    Runs as a fragment so changing a filter, sort option or page only reruns this
+    section instead of the whole dashboard.
+    """
+    try:
         # Filters
         st.subheader("Filter Students")
         col1, col2, col3 = st.columns(3)
         
+        risk_options = df['risk_category'].unique()
+        major_options = df['major'].unique()
+        year_options = df['year_level'].unique()
+        
         with col1:
             risk_filter = st.multiselect("Risk Category", 
-                                       options=df['risk_category'].unique(),
-                                       default=df['risk_category'].unique())
+                                       options=risk_options,
+                                       default=risk_options)
         
         with col2:
             major_filter = st.multiselect("Major", 
-                                        options=df['major'].unique(),
-                                        default=df['major'].unique())
+                                        options=major_options,
+                                        default=major_options)
         
         with col3:
             year_filter = st.multiselect("Year Level", 
-                                       options=df['year_level'].unique(),
-                                       default=df['year_level'].unique())
-        
-        # Apply filters
-        filtered_df = df[
-            (df['risk_category'].isin(risk_filter)) &
-            (df['major'].isin(major_filter)) &
-            (df['year_level'].isin(year_filter))
-        ]
+                                       options=year_options,
+                                       default=year_options)
+        
+        # Apply filters; one with every option selected excludes nothing, so skip it
+        active_filters = tuple(
+            (column, tuple(selected))
+            for column, selected, options in (
+                ('risk_category', risk_filter, risk_options),
+                ('major', major_filter, major_options),
+                ('year_level', year_filter, year_options)
+            )
+            if len(selected) < len(options)
+        )
+        if active_filters:
+            user_email, _ = get_user_credentials()
+            filtered_df = filter_student_risk_data(user_email, active_filters)
+        else:
+            filtered_df = df
         
         # Student list with dynamic count
         total_students = len(df)
@@ -1411,20 +2103,7 @@ def show_student_dashboard():
                 st.info(f"📋 Showing {filtered_students} of {total_students} students based on current filters")
         
         # Color key/legend
-        st.markdown("**Risk Category Color Key:**")
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown(f'<div style="display: flex; align-items: center;"><div style="width: 20px; height: 20px; background-color: #FF4B4B; margin-right: 8px; border-radius: 3px;"></div><span>High Risk</span></div>', unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown(f'<div style="display: flex; align-items: center;"><div style="width: 20px; height: 20px; background-color: #FFA500; margin-right: 8px; border-radius: 3px;"></div><span>Medium Risk</span></div>', unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f'<div style="display: flex; align-items: center;"><div style="width: 20px; height: 20px; background-color: #00CC88; margin-right: 8px; border-radius: 3px;"></div><span>Low Risk</span></div>', unsafe_allow_html=True)
-        
-        with col4:
-            st.markdown(f'<div style="display: flex; align-items: center;"><div style="width: 20px; height: 20px; background-color: #28A745; margin-right: 8px; border-radius: 3px;"></div><span>Excellent</span></div>', unsafe_allow_html=True)
+        st.markdown("**Risk Category Key:** " + " · ".join(f"{RISK_BADGES[category]}{category}" for category in RISK_CATEGORY_ORDER))
         
         st.markdown("---")
         
@@ -1433,42 +2112,25 @@ def show_student_dashboard():
         col1, col2 = st.columns(2)
         
         with col1:
-            sort_by = st.selectbox("Sort by:", 
-                                 options=["Risk Level", "Surname", "GPA (Low to High)", "GPA (High to Low)", 
-                                         "Failing Courses", "Student ID"],
-                                 index=0)
+            sort_by = st.selectbox("Sort by:", options=STUDENT_SORT_OPTIONS, index=0)
         
         with col2:
-            sort_order = st.selectbox("Order:", 
-                                    options=["Default", "Ascending", "Descending"],
-                                    index=0)
-        
-        # Apply sorting
-        def extract_surname(full_name):
-            """Extract surname from full name"""
-            if pd.isna(full_name) or not full_name:
-                return ""
-            parts = str(full_name).strip().split()
-            return parts[-1] if parts else ""
-        
-        # Add surname column for sorting
-        filtered_df = filtered_df.copy()
-        filtered_df['surname'] = filtered_df['full_name'].apply(extract_surname)
-        
-        # Sort the dataframe based on selection
+            sort_order = st.selectbox("Order:", options=SORT_ORDER_OPTIONS, index=0)
+        
+        # Sort the dataframe based on selection; helper columns are only built for the
+        # sort that needs them, without copying the frame up front
         if sort_by == "Risk Level":
-            # Default risk-based sorting
-            risk_order = {'High Risk': 1, 'Medium Risk': 2, 'Low Risk': 3, 'Excellent': 4}
-            filtered_df['risk_order'] = filtered_df['risk_category'].map(risk_order)
-            if sort_order == "Ascending":
-                filtered_df = filtered_df.sort_values(['risk_order', 'failing_grades'], ascending=[True, False])
-            elif sort_order == "Descending":
-                filtered_df = filtered_df.sort_values(['risk_order', 'failing_grades'], ascending=[False, True])
-            else:
-                filtered_df = filtered_df.sort_values(['risk_order', 'failing_grades'], ascending=[True, False])
+            # risk_category is an ordered categorical, so this sorts on its integer codes
+            descending = sort_order == "Descending"
+            filtered_df = filtered_df.sort_values(['risk_category', 'failing_grades'],
+                                                  ascending=[not descending, descending])
         elif sort_by == "Surname":
             ascending = True if sort_order != "Descending" else False
-            filtered_df = filtered_df.sort_values('surname', ascending=ascending)
+            # Surname is the last word of the full name (empty when there is none)
+            filtered_df = filtered_df.sort_values(
+                'full_name', ascending=ascending,
+                key=lambda names: names.str.split().str[-1].fillna("")
+            )
         elif sort_by == "GPA (Low to High)":
             filtered_df = filtered_df.sort_values('gpa', ascending=True)
         elif sort_by == "GPA (High to Low)":
@@ -1482,130 +2144,86 @@ def show_student_dashboard():
         
         st.markdown("---")
         
-        # Display students in a more visual way
-        for idx, student in filtered_df.iterrows():
-            with st.container():
-                col1, col2, col3 = st.columns([3, 2.5, 2])
-                
-                with col1:
-                    risk_color = get_risk_color(student['risk_category'])
-                    st.markdown(f"""
-                    <div style="padding: 10px; border-left: 4px solid {risk_color}; margin: 5px 0;">
-                        <h4 style="margin: 0; color: {risk_color};">{student['full_name']}</h4>
-                        <p style="margin: 0; color: gray;">ID: {student['student_id']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col2:
-                    # Combined student details in a single column
-                    st.markdown(f"""
-                    **Academic Details:**  
-                    📚 Major: {student['major']}  
-                    🎓 Year: {student['year_level']}  
-                    📊 GPA: {student['gpa']:.2f}  
-                    ⚠️ Failing: {student['failing_grades']}/{student['courses_enrolled']} courses  
-                    🎯 Risk: {student['risk_category']}
-                    """)
-                
-                with col3:
-                    # Stack buttons vertically for better text readability
-                    if st.button(f"🤖 AI Rec", key=f"ai_btn_{student['student_id']}", help="Get AI-powered intervention recommendations", use_container_width=True):
-                        # Store student data and navigate to AI Recommendations page
-                        st.session_state.ai_rec_student_id = student['student_id']
-                        st.session_state.ai_rec_student_name = student['full_name']
-                        st.session_state.ai_rec_student_major = student['major']
-                        st.session_state.ai_rec_student_year = student['year_level']
-                        st.session_state.ai_rec_student_gpa = student['gpa']
-                        st.session_state.ai_rec_student_risk = student['risk_category']
-                        st.session_state.ai_rec_student_failing = student['failing_grades']
-                        st.session_state.ai_rec_student_enrolled = student['courses_enrolled']
-                        st.session_state.ai_rec_student_data = student.to_dict()
-                        st.session_state.page = "AI Recommendations"
-                        st.rerun()
-                    
-                    if st.button(f"Create", key=f"btn_{student['student_id']}", help="Create intervention manually", use_container_width=True):
-                        st.session_state.selected_student = student['student_id']
-                        st.session_state.selected_student_name = student['full_name']
-                        st.session_state.selected_student_major = student['major']
-                        st.session_state.selected_student_year = student['year_level']
-                        st.session_state.selected_student_gpa = student['gpa']
-                        st.session_state.selected_student_risk = student['risk_category']
-                        st.session_state.page = "Create Intervention"
-                        st.rerun()
-                
+        # Only one page of students is serialized to the browser on each rerun
+        page = 1
+        page_count = -(-len(filtered_df) // STUDENTS_PAGE_SIZE)
+        if page_count > 1:
+            # Narrower filters can shrink the list below the remembered page
+            if st.session_state.get("students_page", 1) > page_count:
+                st.session_state.students_page = page_count
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                                   step=1, key="students_page")
+            filtered_df = filtered_df.iloc[(page - 1) * STUDENTS_PAGE_SIZE:page * STUDENTS_PAGE_SIZE]
+        
+        # One table widget instead of a container and two buttons per student;
+        # columns are built in vectorized passes
+        filtered_df = filtered_df.reset_index(drop=True)
+        # Badge labels are built per category, not per student
+        risk_categories = filtered_df['risk_category'].cat.categories
+        display_df = pd.DataFrame({
+            'Student': filtered_df['full_name'],
+            'ID': filtered_df['student_id'],
+            'Risk': filtered_df['risk_category'].cat.rename_categories(
+                [RISK_BADGES.get(category, '⚪ ') + category for category in risk_categories]
+            ),
+            'Major': filtered_df['major'],
+            'Year': filtered_df['year_level'],
+            'GPA': filtered_df['gpa'],
+            'Failing': filtered_df['failing_grades'].astype(str) + '/' + filtered_df['courses_enrolled'].astype(str)
+        })
+        
+        st.caption("Select a student to get AI recommendations or create an intervention.")
+        event = st.dataframe(
+            display_df,
+            use_container_width=True,
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            # Per-page key, so a selection doesn't carry over to another page's row
+            key=f"student_table_{page}",
+            column_config={'GPA': st.column_config.NumberColumn(format="%.2f")}
+        )
+        
+        selected_rows = event.selection.rows
+        # A stale selection can point past the end after the filters narrow the table
+        student = filtered_df.iloc[selected_rows[0]] if selected_rows and selected_rows[0] < len(filtered_df) else None
         
+        col1, col2, col3 = st.columns([3, 2, 2])
+        with col1:
+            if student is not None:
+                st.markdown(f"**Selected:** {student['full_name']} ({student['student_id']})")
+        
+        with col2:
+            if st.button("🤖 AI Rec", key="ai_btn_selected", help="Get AI-powered intervention recommendations", use_container_width=True, disabled=student is None):
+                # Store student data and navigate to AI Recommendations page
+                st.session_state.ai_rec_student = student.to_dict()
+                # Drop results shown for a previously selected student
+                st.session_state.ai_recommendations_data = None
+                st.session_state.ai_recommendations_generating = False
+                st.session_state.page = "AI Recommendations"
+                st.rerun()
+        
+        with col3:
+            if st.button("Create", key="btn_selected", help="Create intervention manually", use_container_width=True, disabled=student is None):
+                st.session_state.selected_student = {field: student[field] for field in _SELECTED_STUDENT_FIELDS}
+                st.session_state.page = "Create Intervention"
+                st.rerun()
+
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         st.info("Please check your database connection and credentials.")
 
-def generate_recommendations_streaming(student_data: Dict, response_area):
+
+def generate_recommendations_streaming(student_data: Dict, response_area, force_llm: bool = False):
     """Generate recommendations with streaming display."""
-    # Define the JSON schema for structured output
-    response_format = {
-        "type": "json_schema",
-        "json_schema": {
-            "name": "intervention_recommendations",
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "recommendations": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "intervention_type": {
-                                    "type": "string",
-                                    "enum": ["Academic Meeting", "Study Plan Assignment", "Tutoring Referral", 
-                                           "Counseling Referral", "Financial Aid Consultation", "Career Guidance Session", 
-                                           "Peer Mentoring Program", "Academic Probation Review"]
-                                },
-                                "priority": {
-                                    "type": "string",
-                                    "enum": ["High", "Medium", "Low"]
-                                },
-                                "action": {
-                                    "type": "string",
-                                    "description": "Brief specific action explaining why this student needs this intervention"
-                                },
-                                "timeline": {
-                                    "type": "string",
-                                    "description": "When to implement this intervention"
-                                },
-                                "goal": {
-                                    "type": "string",
-                                    "description": "Measurable outcome specific to this student"
-                                }
-                            },
-                            "required": ["intervention_type", "priority", "action", "timeline", "goal"],
-                            "additionalProperties": False
-                        }
-                    }
-                },
-                "required": ["recommendations"],
-                "additionalProperties": False
-            },
-            "strict": True
-        }
-    }
+    # Low-risk students get standard recommendations without an endpoint round-trip
+    if not force_llm and uses_rules_based_recommendations(student_data):
+        return generate_rules_based_recommendations(student_data)
     
-    # Create prompt
-    prompt = f"""
-Provide 3 concise intervention recommendations for this student. Each recommendation should directly address their specific situation.
-
-Student: {student_data.get('full_name', 'Student')} ({student_data.get('major', 'N/A')}, {student_data.get('year_level', 'N/A')})
-GPA: {student_data.get('gpa', 'N/A')} | Failing: {student_data.get('failing_grades', 0)}/{student_data.get('courses_enrolled', 0)} courses | Risk: {student_data.get('risk_category', 'N/A')}
-
-For each recommendation:
-- Choose intervention_type from: Academic Meeting, Study Plan Assignment, Tutoring Referral, Counseling Referral, Financial Aid Consultation, Career Guidance Session, Peer Mentoring Program, Academic Probation Review
-- Choose intervention modality from: In-Person, Virtual, Phone
-- Set priority: High, Medium, or Low
-- Write brief action explaining why this specific student needs this intervention based on the suggested intervention type and modality historical performance data
-- Specify timeline for implementation
-- Define measurable goal specific to this student's situation
-- Add some best practices for each intervention type and modality suggested based on the unstructured best practices documents available. 
-
-Respond with a JSON object containing an array of 3 recommendations and the information above.
-"""
+    # Imported here so pages that never stream don't pay mlflow's import cost
+    from mlflow.types.responses import ResponsesAgentStreamEvent
+    
+    prompt = build_recommendations_prompt(student_data)
     
     # Prepare messages
     messages = [{"role": "user", "content": prompt}]
@@ -1757,7 +2375,7 @@ Respond with a JSON object containing an array of 3 recommendations and the info
                     "tool_calls": tool_calls,
                     "all_messages": all_messages,
                     "student_context": student_data,
-                    "generated_at": pd.Timestamp.now().isoformat(),
+                    "generated_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds'),
                     "source": "multi_agent_supervisor_streaming_empty"
                 }
             
@@ -1767,9 +2385,7 @@ Respond with a JSON object containing an array of 3 recommendations and the info
             logger.info(f"Final content ends with (last 200 chars): ...{json_content[-200:]}")
             
             # Check for markdown code fence (```json ... ``` or ``` ... ```)
-            import re
-            code_block_pattern = r'```(?:json)?\s*\n(.*?)\n```'
-            code_block_match = re.search(code_block_pattern, json_content, re.DOTALL)
+            code_block_match = _JSON_CODE_BLOCK_RE.search(json_content)
             
             if code_block_match:
                 json_content = code_block_match.group(1).strip()
@@ -1778,8 +2394,7 @@ Respond with a JSON object containing an array of 3 recommendations and the info
             else:
                 logger.warning("✗ No markdown code block found in final_content")
                 # Try to find JSON object directly
-                json_object_pattern = r'\{[\s\S]*"recommendations"[\s\S]*\}'
-                json_object_match = re.search(json_object_pattern, json_content)
+                json_object_match = _JSON_RECOMMENDATIONS_RE.search(json_content)
                 if json_object_match:
                     json_content = json_object_match.group(0).strip()
                     logger.info(f"✓ Found JSON object directly, length: {len(json_content)} chars")
@@ -1825,7 +2440,7 @@ Respond with a JSON object containing an array of 3 recommendations and the info
                 "tool_calls": tool_calls,
                 "all_messages": all_messages,
                 "student_context": student_data,
-                "generated_at": pd.Timestamp.now().isoformat(),
+                "generated_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds'),
                 "source": "multi_agent_supervisor_streaming"
             }
         
@@ -1840,13 +2455,12 @@ Respond with a JSON object containing an array of 3 recommendations and the info
                 "tool_calls": tool_calls,
                 "all_messages": all_messages,
                 "student_context": student_data,
-                "generated_at": pd.Timestamp.now().isoformat(),
+                "generated_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds'),
                 "source": "multi_agent_supervisor_streaming_text"
             }
     
     except Exception as e:
         logger.error(f"Error in streaming recommendations: {str(e)}")
-        import traceback
         logger.info(f"Traceback: {traceback.format_exc()}")
         
         # Return error
@@ -1857,7 +2471,7 @@ Respond with a JSON object containing an array of 3 recommendations and the info
             "tool_calls": [],
             "all_messages": [],
             "student_context": student_data,
-            "generated_at": pd.Timestamp.now().isoformat(),
+            "generated_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds'),
             "source": "error"
         }
 
@@ -1871,8 +2485,6 @@ def parse_agent_tags(content):
             - thinking_blocks: List of thinking content
             - agent_names: List of agent names from <name> tags
     """
-    import re
-    
     if not isinstance(content, str):
         return {
             "cleaned_content": content,
@@ -1884,24 +2496,24 @@ def parse_agent_tags(content):
     agent_names = []
     
     # Extract <think> blocks
-    think_pattern = r'<think>(.*?)</think>'
-    think_matches = re.findall(think_pattern, content, re.DOTALL | re.IGNORECASE)
+    think_matches = _THINK_TAG_RE.findall(content)
     for match in think_matches:
         thinking_blocks.append(match.strip())
     
     # Extract <name> tags (agent handoffs)
-    name_pattern = r'<name>(.*?)</name>'
-    name_matches = re.findall(name_pattern, content, re.DOTALL | re.IGNORECASE)
+    name_matches = _NAME_TAG_RE.findall(content)
     for match in name_matches:
         agent_names.append(match.strip())
     
     # Clean content by removing tags
     cleaned = content
-    cleaned = re.sub(think_pattern, '', cleaned, flags=re.DOTALL | re.IGNORECASE)
-    cleaned = re.sub(name_pattern, '', cleaned, flags=re.DOTALL | re.IGNORECASE)
+    if think_matches:
+        cleaned = _THINK_TAG_RE.sub('', cleaned)
+    if name_matches:
+        cleaned = _NAME_TAG_RE.sub('', cleaned)
     
     # Clean up extra whitespace
-    cleaned = re.sub(r'\n\s*\n\s*\n', '\n\n', cleaned)
+    cleaned = _BLANK_LINES_RE.sub('\n\n', cleaned)
     cleaned = cleaned.strip()
     
     return {
@@ -2006,10 +2618,6 @@ def render_streaming_message(msg):
                 call_id = msg.get("call_id", "unknown")
                 tool_name = msg.get("tool_name", "Unknown Tool")
                 
-                # Create a unique key for this tool result to avoid Streamlit key collisions
-                import hashlib
-                unique_key = hashlib.md5(f"{call_id}_{tool_name}".encode()).hexdigest()[:8]
-                
                 # Extract actual content from potentially nested structures
                 tool_content = extract_tool_result_content(tool_content_raw)
                 
@@ -2061,14 +2669,16 @@ def render_streaming_message(msg):
                                     if len(tool_content) < 1000:
                                         st.text(tool_content)
                                     else:
-                                        # Use scrollable text area for long content
-                                        st.text_area("Output", tool_content, height=300, disabled=True, key=f"tool_output_{unique_key}_1")
+                                        # Scrollable static block for long content
+                                        with st.container(height=300):
+                                            st.text(tool_content)
                             except json.JSONDecodeError:
                                 # Not JSON, display as text
                                 if len(tool_content) < 1000:
                                     st.text(tool_content)
                                 else:
-                                    st.text_area("Output", tool_content, height=300, disabled=True, key=f"tool_output_{unique_key}_2")
+                                    with st.container(height=300):
+                                        st.text(tool_content)
                             except Exception as json_error:
                                 # Handle any JSON parsing errors
                                 logger.warning(f"Error parsing tool content: {json_error}")
@@ -2080,7 +2690,8 @@ def render_streaming_message(msg):
                             if len(content_str) < 1000:
                                 st.text(content_str)
                             else:
-                                st.text_area("Output", content_str, height=300, disabled=True, key=f"tool_output_{unique_key}_3")
+                                with st.container(height=300):
+                                    st.text(content_str)
                         
                         # If we extracted content differently, show raw for debugging
                         if str(tool_content_raw) != str(tool_content) and tool_content_raw:
@@ -2113,31 +2724,41 @@ def render_streaming_message(msg):
                 st.code(str(msg)[:500])
 
 
+def get_recommendations_cache_key(student_data: Dict) -> tuple:
+    """Key for reusing a student's recommendations: changes when the inputs to the prompt change"""
+    return tuple(
+        str(student_data.get(field))
+        for field in ('student_id', 'gpa', 'risk_category', 'failing_grades', 'courses_enrolled')
+    )
+
+
 def show_ai_recommendations_page():
     """Show AI recommendations with streaming thought process"""
     st.header("🤖 AI-Powered Intervention Recommendations")
     
     # Check if we have student data
-    if 'ai_rec_student_id' not in st.session_state:
+    if 'ai_rec_student' not in st.session_state:
         st.warning("No student selected. Please return to the dashboard and select a student.")
-        if st.button("← Back to Dashboard"):
-            st.session_state.page = "Student Risk Dashboard"
-            st.rerun()
+        st.button("← Back to Dashboard", on_click=set_session_values, kwargs={'page': "Student Risk Dashboard"})
         return
     
+    ai_rec_student = st.session_state.ai_rec_student
+    
     # Display student information
-    st.subheader(f"Student: {st.session_state.ai_rec_student_name}")
+    st.subheader(f"Student: {ai_rec_student['full_name']}")
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Student ID", st.session_state.ai_rec_student_id)
+        st.metric("Student ID", ai_rec_student['student_id'])
     with col2:
-        st.metric("Major", st.session_state.ai_rec_student_major)
+        st.metric("Major", ai_rec_student['major'])
     with col3:
-        st.metric("Year", st.session_state.ai_rec_student_year)
+        st.metric("Year", ai_rec_student['year_level'])
     with col4:
-        risk_color = get_risk_color(st.session_state.ai_rec_student_risk)
-        st.markdown(f'<div style="padding: 10px; background-color: {risk_color}20; border-left: 4px solid {risk_color}; border-radius: 5px;"><strong>Risk:</strong> {st.session_state.ai_rec_student_risk}<br><strong>GPA:</strong> {st.session_state.ai_rec_student_gpa:.2f}</div>', unsafe_allow_html=True)
+        student_risk = ai_rec_student['risk_category']
+        student_gpa = ai_rec_student['gpa']
+        risk_color = get_risk_color(student_risk)
+        st.markdown(f'<div style="padding: 10px; background-color: {risk_color}20; border-left: 4px solid {risk_color}; border-radius: 5px;"><strong>Risk:</strong> {student_risk}<br><strong>GPA:</strong> {student_gpa:.2f}</div>', unsafe_allow_html=True)
     
     st.markdown("---")
     
@@ -2146,11 +2767,26 @@ def show_ai_recommendations_page():
         st.session_state.ai_recommendations_data = None
         st.session_state.ai_recommendations_generating = False
     
+    # Reuse recommendations already generated for this student in this session
+    recommendations_by_student = st.session_state.setdefault('ai_recommendations_by_student', {})
+    student_cache_key = get_recommendations_cache_key(ai_rec_student)
+    # ...and across sessions through the process-wide response cache. The streaming
+    # client runs as the app's service principal, not the user, so these results live
+    # under their own 'recommendations' key and are never returned for an OBO prompt
+    # lookup; they are kept per user only so one user's results aren't shown to another
+    user_email, _ = get_user_credentials()
+    shared_cache_key = ('recommendations', user_email, *student_cache_key)
+    if st.session_state.ai_recommendations_data is None:
+        if student_cache_key not in recommendations_by_student:
+            shared_recommendations = get_cached_llm_response(shared_cache_key)
+            if shared_recommendations is not None:
+                recommendations_by_student[student_cache_key] = shared_recommendations
+        st.session_state.ai_recommendations_data = recommendations_by_student.get(student_cache_key)
+    
     # Generate recommendations button
     if not st.session_state.ai_recommendations_generating and st.session_state.ai_recommendations_data is None:
-        if st.button("✨ Generate AI Recommendations", type="primary", use_container_width=True):
-            st.session_state.ai_recommendations_generating = True
-            st.rerun()
+        st.button("✨ Generate AI Recommendations", type="primary", use_container_width=True,
+                  on_click=set_session_values, kwargs={'ai_recommendations_generating': True})
     
     # Show streaming process
     if st.session_state.ai_recommendations_generating:
@@ -2167,11 +2803,16 @@ def show_ai_recommendations_page():
         
         try:
             # Call the streaming endpoint
-            student_data = st.session_state.ai_rec_student_data
-            recommendations = generate_recommendations_streaming(student_data, response_area)
+            recommendations = generate_recommendations_streaming(
+                ai_rec_student, response_area,
+                force_llm=st.session_state.pop('ai_recommendations_force_llm', False)
+            )
             
             # Store the recommendations
             st.session_state.ai_recommendations_data = recommendations
+            if recommendations and recommendations.get('structured_recommendations'):
+                recommendations_by_student[student_cache_key] = recommendations
+                store_llm_response(shared_cache_key, recommendations, content_field='structured_recommendations')
             
             # Display completion message
             st.success("✅ Analysis complete!")
@@ -2196,6 +2837,8 @@ def show_ai_recommendations_page():
         # Display summary of structured recommendations
         if recommendations.get('structured_recommendations') and len(recommendations.get('structured_recommendations', [])) > 0:
             st.markdown("### ✨ Recommended Interventions")
+            if recommendations.get('source') == 'rules':
+                st.caption("ℹ️ Standard recommendations for a low-risk student (generated without the AI agent)")
             st.markdown("*Choose one of the following AI-recommended interventions to create*")
             st.markdown("---")
             
@@ -2228,25 +2871,16 @@ def show_ai_recommendations_page():
                 # Add button to create intervention from this recommendation
                 button_col1, button_col2 = st.columns([1, 3])
                 with button_col1:
-                    if st.button(f"📝 Create Intervention", key=f"create_from_rec_{idx}", type="primary", use_container_width=True):
-                        # Store the selected recommendation and student data
-                        st.session_state.selected_recommendation = rec
-                        st.session_state.selected_recommendation_index = idx
-                        
-                        # Store student data for the intervention
-                        st.session_state.selected_student = st.session_state.ai_rec_student_id
-                        st.session_state.selected_student_name = st.session_state.ai_rec_student_name
-                        st.session_state.selected_student_major = st.session_state.ai_rec_student_major
-                        st.session_state.selected_student_year = st.session_state.ai_rec_student_year
-                        st.session_state.selected_student_gpa = st.session_state.ai_rec_student_gpa
-                        st.session_state.selected_student_risk = st.session_state.ai_rec_student_risk
-                        
-                        # Store AI recommendations for the Create Intervention page
-                        st.session_state.ai_recommendations = recommendations
-                        
-                        # Navigate to Create Intervention page
-                        st.session_state.page = "Create Intervention"
-                        st.rerun()
+                    # Stores the recommendation, student and all recommendations for the
+                    # Create Intervention page, then navigates there on the click's rerun
+                    st.button(f"📝 Create Intervention", key=f"create_from_rec_{idx}", type="primary",
+                              use_container_width=True, on_click=set_session_values, kwargs={
+                                  'selected_recommendation': rec,
+                                  'selected_recommendation_index': idx,
+                                  'selected_student': {field: ai_rec_student[field] for field in _SELECTED_STUDENT_FIELDS},
+                                  'ai_recommendations': recommendations,
+                                  'page': "Create Intervention"
+                              })
                 
                 # Add separator between recommendations
                 if idx < len(structured_recs):
@@ -2269,18 +2903,25 @@ def show_ai_recommendations_page():
     col1, col2 = st.columns([1, 1])
     
     with col1:
-        if st.button("🔄 Regenerate", use_container_width=True):
-            st.session_state.ai_recommendations_data = None
-            st.session_state.ai_recommendations_generating = False
-            st.rerun()
+        # Regenerating standard recommendations asks the AI instead of rebuilding the same rules
+        from_rules = (st.session_state.ai_recommendations_data or {}).get('source') == 'rules'
+        
+        def regenerate():
+            recommendations_by_student.pop(student_cache_key, None)
+            discard_llm_response(shared_cache_key)
+            set_session_values(ai_recommendations_data=None, ai_recommendations_generating=from_rules,
+                               ai_recommendations_force_llm=from_rules)
+        
+        st.button("🤖 Regenerate with AI" if from_rules else "🔄 Regenerate",
+                  use_container_width=True, on_click=regenerate)
     
     with col2:
-        if st.button("← Back to Dashboard", use_container_width=True):
-            # Clear AI recommendations data
-            st.session_state.ai_recommendations_data = None
-            st.session_state.ai_recommendations_generating = False
-            st.session_state.page = "Student Risk Dashboard"
-            st.rerun()
+        # Clear AI recommendations data and go back
+        st.button("← Back to Dashboard", use_container_width=True, on_click=set_session_values, kwargs={
+            'ai_recommendations_data': None,
+            'ai_recommendations_generating': False,
+            'page': "Student Risk Dashboard"
+        })
 
 def show_create_intervention():
     st.header("📝 Create Student Intervention")
@@ -2338,21 +2979,18 @@ def show_create_intervention():
         
         # Clear button
         st.markdown("---")
-        if st.button("🗑️ Clear AI Recommendations", type="secondary"):
-            # Clear all AI-related session state
-            for key in ['ai_recommendations', 'ai_generated_details', 'ai_selected_intervention_type', 'ai_selected_priority']:
-                if key in st.session_state:
-                    del st.session_state[key]
-            st.rerun()
+        # Clear all AI-related session state
+        st.button("🗑️ Clear AI Recommendations", type="secondary", on_click=clear_session_keys, args=(_AI_RECOMMENDATION_KEYS,))
     
     # Check if student was selected from dashboard
-    if 'selected_student' in st.session_state:
-        default_student_id = st.session_state.selected_student
-        default_student_name = st.session_state.get('selected_student_name', '')
-        student_major = st.session_state.get('selected_student_major', '')
-        student_year = st.session_state.get('selected_student_year', '')
-        student_gpa = st.session_state.get('selected_student_gpa', 0.0)
-        student_risk = st.session_state.get('selected_student_risk', '')
+    selected_student = st.session_state.get('selected_student')
+    if selected_student is not None:
+        default_student_id = selected_student['student_id']
+        default_student_name = selected_student['full_name']
+        student_major = selected_student['major']
+        student_year = selected_student['year_level']
+        student_gpa = selected_student['gpa']
+        student_risk = selected_student['risk_category']
         
         # Display student information
         st.success(f"Creating intervention for: **{default_student_name}** (ID: {default_student_id})")
@@ -2368,14 +3006,7 @@ def show_create_intervention():
             st.markdown(f'<div style="padding: 10px; background-color: {risk_color}20; border-left: 4px solid {risk_color}; border-radius: 5px;"><strong>Risk Level:</strong> {student_risk}<br><strong>GPA:</strong> {student_gpa:.2f}</div>', unsafe_allow_html=True)
         
         # Add a button to clear the selection and start fresh
-        if st.button("🔄 Clear Selection & Start Fresh"):
-            for key in ['selected_student', 'selected_student_name', 'selected_student_major', 
-                       'selected_student_year', 'selected_student_gpa', 'selected_student_risk',
-                       'ai_recommendations', 'ai_generated_details', 'ai_selected_intervention_type', 
-                       'ai_selected_priority', 'parsed_ai_recommendations', 'ai_meeting_details']:
-                if key in st.session_state:
-                    del st.session_state[key]
-            st.rerun()
+        st.button("🔄 Clear Selection & Start Fresh", on_click=clear_session_keys, args=(_FORM_CLEANUP_KEYS,))
     else:
         default_student_id = ""
     
@@ -2386,67 +3017,50 @@ def show_create_intervention():
         
         st.success(f"📌 Using Recommendation #{rec_index} to create intervention")
         
-        # Pre-populate AI recommendation fields
-        st.session_state.ai_selected_intervention_type = selected_rec.get('intervention_type', '')
-        st.session_state.ai_selected_priority = selected_rec.get('priority', 'Medium')
-        
-        # Format recommendation details for the intervention details field
-        ai_details_text = f"🤖 AI-Generated Recommendation #{rec_index}\n\n"
-        ai_details_text += f"Intervention Type: {selected_rec.get('intervention_type', 'N/A')}\n"
-        ai_details_text += f"Priority Level: {selected_rec.get('priority', 'N/A')}\n\n"
-        
-        if selected_rec.get('action'):
-            ai_details_text += f"Recommended Action:\n{selected_rec['action']}\n\n"
-        
-        if selected_rec.get('timeline'):
-            ai_details_text += f"Timeline: {selected_rec['timeline']}\n\n"
-        
-        if selected_rec.get('measurable_goal'):
-            ai_details_text += f"Measurable Goal: {selected_rec['measurable_goal']}\n\n"
-        elif selected_rec.get('goal'):
-            ai_details_text += f"Goal: {selected_rec['goal']}\n\n"
-        
-        if selected_rec.get('best_practices'):
-            ai_details_text += f"Best Practices:\n{selected_rec['best_practices']}"
-        
-        st.session_state.ai_generated_details = ai_details_text
-        
-        # For Academic Meeting, generate meeting-specific details
-        if selected_rec.get('intervention_type') == 'Academic Meeting':
-            from datetime import datetime, timedelta
+        # Pre-fill the form from a recommendation once, when it is selected, rather than
+        # on every rerun; this also keeps "Clear AI Details" from being undone
+        if st.session_state.get('applied_recommendation') is not selected_rec:
+            st.session_state.applied_recommendation = selected_rec
             
-            # Parse timeline for date suggestion
-            timeline = selected_rec.get('timeline', '')
-            if 'within 1 week' in timeline.lower() or 'immediate' in timeline.lower():
-                suggested_date = datetime.now().date() + timedelta(days=2)
-            elif 'within 2 weeks' in timeline.lower():
-                suggested_date = datetime.now().date() + timedelta(days=7)
-            elif 'within 3 days' in timeline.lower():
-                suggested_date = datetime.now().date() + timedelta(days=2)
-            else:
-                suggested_date = datetime.now().date() + timedelta(days=7)
+            # Pre-populate AI recommendation fields
+            st.session_state.ai_selected_intervention_type = selected_rec.get('intervention_type', '')
+            st.session_state.ai_selected_priority = selected_rec.get('priority', 'Medium')
             
-            # Determine modality from recommendation if specified
-            modality = selected_rec.get('modality', 'In-Person')
+            # Format recommendation details for the intervention details field
+            ai_details_text = format_recommendation_details(
+                rec_index, *(str(selected_rec.get(field) or '') for field in _RECOMMENDATION_DETAIL_FIELDS)
+            )
             
-            st.session_state.ai_meeting_details = {
-                'meeting_type': modality,
-                'meeting_date': suggested_date,
-                'meeting_time': datetime.strptime("10:00", "%H:%M").time(),
-                'agenda': ai_details_text
-            }
+            st.session_state.ai_generated_details = ai_details_text
+            
+            # For Academic Meeting, generate meeting-specific details
+            if selected_rec.get('intervention_type') == 'Academic Meeting':
+                # Parse timeline for date suggestion
+                timeline = selected_rec.get('timeline', '')
+                if 'within 1 week' in timeline.lower() or 'immediate' in timeline.lower():
+                    suggested_date = _dt.date.today() + _dt.timedelta(days=2)
+                elif 'within 2 weeks' in timeline.lower():
+                    suggested_date = _dt.date.today() + _dt.timedelta(days=7)
+                elif 'within 3 days' in timeline.lower():
+                    suggested_date = _dt.date.today() + _dt.timedelta(days=2)
+                else:
+                    suggested_date = _dt.date.today() + _dt.timedelta(days=7)
+                
+                # Determine modality from recommendation if specified
+                modality = selected_rec.get('modality', 'In-Person')
+                
+                st.session_state.ai_meeting_details = {
+                    'meeting_type': modality,
+                    'meeting_date': suggested_date,
+                    'meeting_time': _TIME_10AM,
+                    'agenda': ai_details_text
+                }
         
         # Clear the selected recommendation so it doesn't persist
-        if st.button("🗑️ Clear Selected Recommendation"):
-            del st.session_state.selected_recommendation
-            del st.session_state.selected_recommendation_index
-            del st.session_state.ai_generated_details
-            if 'ai_meeting_details' in st.session_state:
-                del st.session_state.ai_meeting_details
-            st.rerun()
+        st.button("🗑️ Clear Selected Recommendation", on_click=clear_session_keys, args=(_SELECTED_RECOMMENDATION_KEYS,))
     
     # AI-Enhanced Details Generation (outside the form)
-    if 'selected_student' in st.session_state:
+    if selected_student is not None:
         st.markdown("---")
         st.subheader("🤖 AI-Powered Assistance")
         
@@ -2461,34 +3075,21 @@ def show_create_intervention():
                 st.write("**Configure AI Generation:**")
                 ai_intervention_type = st.selectbox(
                     "Intervention Type for AI",
-                    [
-                        "Academic Meeting",
-                        "Study Plan Assignment", 
-                        "Tutoring Referral",
-                        "Counseling Referral",
-                        "Financial Aid Consultation",
-                        "Career Guidance Session",
-                        "Peer Mentoring Program",
-                        "Academic Probation Review"
-                    ],
+                    INTERVENTION_OPTIONS,
                     key="ai_intervention_type"
                 )
-                ai_priority = st.selectbox("Priority Level", ["High", "Medium", "Low"], key="ai_priority")
+                ai_priority = st.selectbox("Priority Level", PRIORITY_OPTIONS, key="ai_priority")
                 
                 if st.button("Generate Details", key="generate_ai_details_btn"):
                     with st.spinner("Generating AI-enhanced details..."):
                         student_data = {
-                            'student_id': st.session_state.selected_student,
-                            'full_name': st.session_state.get('selected_student_name', ''),
-                            'major': st.session_state.get('selected_student_major', ''),
-                            'year_level': st.session_state.get('selected_student_year', ''),
-                            'gpa': st.session_state.get('selected_student_gpa', 0.0),
-                            'risk_category': st.session_state.get('selected_student_risk', ''),
+                            **selected_student,
                             'courses_enrolled': 5,  # Default values - could be enhanced
-                            'failing_grades': 1 if st.session_state.get('selected_student_risk') == 'High Risk' else 0
+                            'failing_grades': 1 if selected_student['risk_category'] == 'High Risk' else 0
                         }
                         
-                        ai_details = generate_personalized_intervention_details(
+                        # Text appears as it is generated, then the form is pre-filled on rerun
+                        ai_details = generate_personalized_intervention_details_streaming(
                             ai_intervention_type, student_data, ai_priority
                         )
                         
@@ -2501,12 +3102,8 @@ def show_create_intervention():
         
         with col_ai3:
             if 'ai_generated_details' in st.session_state:
-                if st.button("🗑️ Clear AI Details"):
-                    # Clear all AI-related session state
-                    for key in ['ai_generated_details', 'ai_selected_intervention_type', 'ai_selected_priority']:
-                        if key in st.session_state:
-                            del st.session_state[key]
-                    st.rerun()
+                # Clear all AI-related session state
+                st.button("🗑️ Clear AI Details", on_click=clear_session_keys, args=(_AI_DETAILS_KEYS,))
         
         
         st.markdown("---")
@@ -2518,26 +3115,13 @@ def show_create_intervention():
             student_id = st.text_input("Student ID", value=default_student_id)
             
             # Use AI-generated intervention type as default if available
-            intervention_options = [
-                "Academic Meeting",
-                "Study Plan Assignment", 
-                "Tutoring Referral",
-                "Counseling Referral",
-                "Financial Aid Consultation",
-                "Career Guidance Session",
-                "Peer Mentoring Program",
-                "Academic Probation Review"
-            ]
-            
-            default_intervention_index = 0
-            if 'ai_selected_intervention_type' in st.session_state:
-                ai_type = st.session_state['ai_selected_intervention_type']
-                if ai_type in intervention_options:
-                    default_intervention_index = intervention_options.index(ai_type)
-            
+            default_intervention_index = _INTERVENTION_INDEX.get(
+                st.session_state.get('ai_selected_intervention_type', ''), 0
+            )
+
             intervention_type = st.selectbox(
                 "Intervention Type",
-                intervention_options,
+                INTERVENTION_OPTIONS,
                 index=default_intervention_index
             )
         
@@ -2546,15 +3130,12 @@ def show_create_intervention():
             user_email, _ = get_user_credentials()
             created_by = st.text_input("Created By (Email)", value=user_email, disabled=True)
             
-            # Use AI-generated priority as default if available
-            priority_options = ["High", "Medium", "Low"]
-            default_priority_index = 1  # Default to Medium
-            if 'ai_selected_priority' in st.session_state:
-                ai_priority = st.session_state['ai_selected_priority']
-                if ai_priority in priority_options:
-                    default_priority_index = priority_options.index(ai_priority)
-            
-            priority = st.selectbox("Priority", priority_options, index=default_priority_index)
+            # Use AI-generated priority as default if available (Medium otherwise)
+            default_priority_index = _PRIORITY_INDEX.get(
+                st.session_state.get('ai_selected_priority', ''), 1
+            )
+
+            priority = st.selectbox("Priority", PRIORITY_OPTIONS, index=default_priority_index)
         
         # Intervention details based on type
         st.subheader("Intervention Details")
@@ -2566,17 +3147,21 @@ def show_create_intervention():
         if ai_details:
             st.info("🤖 AI-generated details are pre-filled below. You can edit them as needed.")
         
+        # Formatted once for whichever non-meeting branch renders it; Academic Meeting
+        # formats its own agenda text, and a fresh intervention has nothing to format
+        if ai_details and intervention_type != "Academic Meeting":
+            formatted_ai_details = format_intervention_details_for_display(ai_details)
+        else:
+            formatted_ai_details = ''
+        
         if intervention_type == "Academic Meeting":
             # Use AI-generated meeting details if available
             ai_meeting_details = st.session_state.get('ai_meeting_details', {})
             
             # Pre-select meeting type from AI recommendation
-            meeting_type_options = ["In-Person", "Virtual", "Phone"]
-            default_meeting_type_index = 0
-            if ai_meeting_details.get('meeting_type') in meeting_type_options:
-                default_meeting_type_index = meeting_type_options.index(ai_meeting_details['meeting_type'])
-            
-            meeting_type = st.selectbox("Meeting Type", meeting_type_options, index=default_meeting_type_index)
+            default_meeting_type_index = _MEETING_TYPE_INDEX.get(ai_meeting_details.get('meeting_type'), 0)
+
+            meeting_type = st.selectbox("Meeting Type", MEETING_TYPE_OPTIONS, index=default_meeting_type_index)
             
             # Pre-populate date and time from AI recommendation
             default_date = ai_meeting_details.get('meeting_date', None)
@@ -2589,7 +3174,7 @@ def show_create_intervention():
             agenda_text = ai_meeting_details.get('agenda', ai_details)
             
             # Format the agenda text for better display
-            formatted_agenda = format_intervention_details_for_display(agenda_text)
+            formatted_agenda = format_intervention_details_for_display(agenda_text) if agenda_text else ''
             
             
             agenda = st.text_area("Meeting Agenda", 
@@ -2599,37 +3184,37 @@ def show_create_intervention():
             details = f"Meeting Type: {meeting_type}, Date: {meeting_date}, Time: {meeting_time}, Agenda: {agenda}"
             
         elif intervention_type == "Study Plan Assignment":
-            study_duration = st.selectbox("Study Plan Duration", ["2 weeks", "1 month", "1 semester"])
-            focus_areas = st.multiselect("Focus Areas", ["Time Management", "Note Taking", "Test Preparation", "Research Skills", "Writing Skills"])
+            study_duration = st.selectbox("Study Plan Duration", STUDY_DURATION_OPTIONS)
+            focus_areas = st.multiselect("Focus Areas", FOCUS_AREA_OPTIONS)
                 
             goals = st.text_area("Specific Goals", 
-                               value=format_intervention_details_for_display(ai_details),
+                               value=formatted_ai_details,
                                placeholder="Improve GPA to 2.5, complete all assignments on time...")
             details = f"Duration: {study_duration}, Focus Areas: {', '.join(focus_areas)}, Goals: {goals}"
             
         elif intervention_type == "Tutoring Referral":
             subjects = st.text_input("Subjects Needing Tutoring")
-            tutoring_type = st.selectbox("Tutoring Type", ["Individual", "Group", "Online"])
-            frequency = st.selectbox("Frequency", ["Once a week", "Twice a week", "Three times a week"])
+            tutoring_type = st.selectbox("Tutoring Type", TUTORING_TYPE_OPTIONS)
+            frequency = st.selectbox("Frequency", TUTORING_FREQUENCY_OPTIONS)
                 
             tutor_notes = st.text_area("Additional Tutoring Details", 
-                                     value=format_intervention_details_for_display(ai_details),
+                                     value=formatted_ai_details,
                                      placeholder="Specific tutoring requirements, learning objectives...")
             details = f"Subjects: {subjects}, Type: {tutoring_type}, Frequency: {frequency}, Additional Details: {tutor_notes}"
             
         elif intervention_type == "Counseling Referral":
-            counseling_type = st.selectbox("Counseling Type", ["Academic", "Personal", "Career", "Mental Health"])
-            urgency = st.selectbox("Urgency", ["Immediate", "Within a week", "Within a month"])
+            counseling_type = st.selectbox("Counseling Type", COUNSELING_TYPE_OPTIONS)
+            urgency = st.selectbox("Urgency", URGENCY_OPTIONS)
                 
             reason = st.text_area("Reason for Referral", 
-                                value=format_intervention_details_for_display(ai_details),
+                                value=formatted_ai_details,
                                 placeholder="Describe the specific concerns and referral reasons...")
             details = f"Type: {counseling_type}, Urgency: {urgency}, Reason: {reason}"
             
         else:
             # For other intervention types, use the full AI details
             details = st.text_area("Intervention Details", 
-                                 value=format_intervention_details_for_display(ai_details),
+                                 value=formatted_ai_details,
                                  placeholder="Provide specific details about the intervention...")
         
         # Additional notes section - pre-fill with selected or top recommendation if available
@@ -2681,18 +3266,13 @@ def show_create_intervention():
         if submitted:
             if student_id and intervention_type and created_by:
                 try:
-                    submit_intervention(student_id, intervention_type, full_details, created_by)
+                    submit_intervention(student_id, intervention_type, full_details, created_by, priority)
                     st.success(f"✅ Intervention created successfully for Student ID: {student_id}")
                     st.balloons()
                     
                     # Clear session state
-                    for key in ['selected_student', 'selected_student_name', 'selected_student_major', 
-                               'selected_student_year', 'selected_student_gpa', 'selected_student_risk',
-                               'ai_recommendations', 'ai_generated_details', 'ai_selected_intervention_type', 
-                               'ai_selected_priority', 'parsed_ai_recommendations', 'ai_meeting_details']:
-                        if key in st.session_state:
-                            del st.session_state[key]
-                        
+                    clear_session_keys(_FORM_CLEANUP_KEYS)
+
                 except Exception as e:
                     st.error(f"Error submitting intervention: {str(e)}")
             else:
@@ -2705,9 +3285,9 @@ def show_scheduled_remediations():
     st.markdown("---")
     
     try:
-        # Load scheduled remediations
-        with st.spinner("Loading scheduled remediations..."):
-            df = load_scheduled_remediations()
+        # Load scheduled remediations (the cache shows a spinner only on a miss)
+        user_email, _ = get_user_credentials()
+        df = load_scheduled_remediations(user_email)
         
         if df.empty:
             st.info("📋 No scheduled remediations found.")
@@ -2715,109 +3295,111 @@ def show_scheduled_remediations():
             return
         
         # Summary metrics
-        col1, col2, col3, col4 = st.columns(4)
+        total_col, *priority_cols = st.columns(1 + len(PRIORITY_OPTIONS))
         
-        with col1:
+        with total_col:
             total_remediations = len(df)
             st.metric("Total Scheduled", total_remediations)
         
-        with col2:
-            high_priority = len(df[df['intervention_details'].str.contains('Priority: High', na=False)])
-            st.metric("High Priority", high_priority, delta=f"{high_priority/total_remediations*100:.1f}%")
-        
-        with col3:
-            medium_priority = len(df[df['intervention_details'].str.contains('Priority: Medium', na=False)])
-            st.metric("Medium Priority", medium_priority, delta=f"{medium_priority/total_remediations*100:.1f}%")
-        
-        with col4:
-            low_priority = len(df[df['intervention_details'].str.contains('Priority: Low', na=False)])
-            st.metric("Low Priority", low_priority, delta=f"{low_priority/total_remediations*100:.1f}%")
+        # Counts for every priority (zero included) from the precomputed categorical,
+        # one metric per priority in PRIORITY_OPTIONS order
+        priority_counts = df['priority_label'].value_counts()
+        percent_per_item = (100.0 / total_remediations) if total_remediations else 0.0
+        for priority_col, (priority, count) in zip(priority_cols, priority_counts.reindex(PRIORITY_OPTIONS).items()):
+            with priority_col:
+                st.metric(f"{priority} Priority", int(count), delta=f"{count * percent_per_item:.1f}%")
         
         st.markdown("---")
         
         # Priority color legend
         st.markdown("**Priority Color Key:**")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.markdown(f'<div style="display: flex; align-items: center;"><div style="width: 20px; height: 20px; background-color: #FF4B4B; margin-right: 8px; border-radius: 3px;"></div><span>High Priority</span></div>', unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown(f'<div style="display: flex; align-items: center;"><div style="width: 20px; height: 20px; background-color: #FFA500; margin-right: 8px; border-radius: 3px;"></div><span>Medium Priority</span></div>', unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f'<div style="display: flex; align-items: center;"><div style="width: 20px; height: 20px; background-color: #00CC88; margin-right: 8px; border-radius: 3px;"></div><span>Low Priority</span></div>', unsafe_allow_html=True)
+        st.markdown(PRIORITY_LEGEND_HTML, unsafe_allow_html=True)
         
         st.markdown("---")
         
         # Display remediations
+        show_remediation_cards(df)
+        
+    except Exception as e:
+        st.error(f"Error loading scheduled remediations: {str(e)}")
+        st.info("Please check your database connection and permissions.")
+
+
+@st.fragment
+def show_remediation_cards(df):
+    """Paged list of scheduled remediation cards
+    
+    Runs as a fragment so paging, selecting an intervention and marking it complete
+    only rerun the list. Completions are collected in session state and written in one
+    batch on save, which reruns the whole page so the summary metrics update.
+    """
+    try:
+        # Hide interventions already marked complete but not yet saved
+        pending_completions = st.session_state.get('pending_completions')
+        if pending_completions:
+            st.info(f"✅ {len(pending_completions)} intervention(s) marked complete and not saved yet.")
+            save_col, discard_col = st.columns([1, 1])
+            with save_col:
+                if st.button("💾 Save Completions", type="primary", use_container_width=True):
+                    try:
+                        complete_interventions(pending_completions)
+                        del st.session_state.pending_completions
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error updating interventions: {str(e)}")
+            with discard_col:
+                st.button("↩️ Discard", use_container_width=True,
+                          on_click=clear_session_keys, args=(frozenset({'pending_completions'}),))
+            # One vectorized membership test on the (student_id, created_date) key
+            df = df[~pd.MultiIndex.from_frame(df[['student_id', 'created_date']]).isin(list(pending_completions))]
+        
         st.subheader(f"Scheduled Interventions ({len(df)} items)")
         
-        for idx, remediation in df.iterrows():
-            # Extract priority from intervention details
-            priority = "Medium"  # Default
-            if "Priority: High" in str(remediation['intervention_details']):
-                priority = "High"
-            elif "Priority: Low" in str(remediation['intervention_details']):
-                priority = "Low"
+        # Only render one page of cards; the index labels (the selectbox options) are
+        # kept, so a selection still names the same intervention after a rerun
+        page_count = -(-len(df) // REMEDIATIONS_PAGE_SIZE)
+        page_df = df
+        if page_count > 1:
+            # Completing interventions can shrink the list below the remembered page
+            if st.session_state.get("remediations_page", 1) > page_count:
+                st.session_state.remediations_page = page_count
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                                   step=1, key="remediations_page")
+            start = (page - 1) * REMEDIATIONS_PAGE_SIZE
+            page_df = df.iloc[start:start + REMEDIATIONS_PAGE_SIZE]
+        
+        # The page's cards go out as one markdown element, and the actions are built once
+        # for the selected intervention instead of two buttons per card
+        st.markdown("".join(page_df['card_html']), unsafe_allow_html=True)
+        
+        # Paging or completing can drop the remembered selection from this page
+        if st.session_state.get("selected_remediation_idx") not in page_df.index:
+            st.session_state.pop("selected_remediation_idx", None)
+        selected_idx = st.selectbox(
+            "Select an intervention", options=page_df.index, index=None,
+            placeholder="Choose an intervention to view or complete",
+            format_func=lambda idx: (f"{page_df.at[idx, 'intervention_type']} · "
+                                     f"{page_df.at[idx, 'student_id']} · {page_df.at[idx, 'created_str']}"),
+            key="selected_remediation_idx"
+        )
+        
+        if selected_idx is not None:
+            selected = page_df.loc[selected_idx]
+            # Static, scrollable block; a disabled text_area would still be a widget
+            st.markdown("**Full Intervention Details**")
+            with st.container(height=200):
+                st.text(selected['intervention_details'])
             
-            priority_color = get_priority_color(priority)
+            def mark_complete():
+                # Queued for the next Save Completions rather than written per click
+                add_to_session_set('pending_completions', (selected['student_id'], selected['created_date']))
+                clear_session_keys(("selected_remediation_idx",))
             
-            with st.container():
-                col1, col2, col3, col4 = st.columns([2.5, 1.5, 1.5, 2.5])
-                
-                with col1:
-                    st.markdown(f"""
-                    <div style="padding: 15px; border-left: 4px solid {priority_color}; margin: 10px 0; background-color: {priority_color}10; border-radius: 5px;">
-                        <h4 style="margin: 0; color: {priority_color};">{remediation['intervention_type']}</h4>
-                        <p style="margin: 5px 0; color: gray;"><strong>Student ID:</strong> {remediation['student_id']}</p>
-                        <p style="margin: 5px 0; color: gray;"><strong>Priority:</strong> {priority}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col2:
-                    st.write(f"**Created:** {remediation['created_date'].strftime('%Y-%m-%d %H:%M')}")
-                    st.write(f"**Status:** {remediation['status']}")
-                
-                with col3:
-                    st.write(f"**Created By:** {remediation['created_by']}")
-                
-                with col4:
-                    # Store the key for toggling details
-                    detail_key = f"show_detail_{idx}"
-                    if detail_key not in st.session_state:
-                        st.session_state[detail_key] = False
-                    
-                    if st.button("View Details" if not st.session_state[detail_key] else "Hide Details", 
-                                key=f"view_{idx}", use_container_width=True):
-                        st.session_state[detail_key] = not st.session_state[detail_key]
-                        st.rerun()
-                    
-                    if st.button("Mark Complete", key=f"complete_{idx}", use_container_width=True):
-                        # Update status to completed
-                        try:
-                            with get_connection(DATABASE_REMEDIATION_DATA) as conn:
-                                with conn.cursor() as cur:
-                                    update_query = """
-                                    UPDATE public.student_interventions 
-                                    SET status = 'Completed' 
-                                    WHERE student_id = %s AND created_date = %s
-                                    """
-                                    cur.execute(update_query, (remediation['student_id'], remediation['created_date']))
-                                    conn.commit()
-                            st.success("✅ Intervention marked as completed!")
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"Error updating intervention: {str(e)}")
-                
-                # Show details outside the columns if toggled
-                if st.session_state.get(f"show_detail_{idx}", False):
-                    st.text_area("Full Intervention Details", value=remediation['intervention_details'], 
-                                height=200, disabled=True, key=f"details_text_{idx}")
-        
+            st.button("Mark Complete", use_container_width=True, on_click=mark_complete)
+    
     except Exception as e:
-        st.error(f"Error loading scheduled remediations: {str(e)}")
-        st.info("Please check your database connection and permissions.")
+        st.error(f"Error displaying scheduled remediations: {str(e)}")
+
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
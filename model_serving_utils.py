@@ -1,8 +1,7 @@
-from mlflow.deployments import get_deploy_client
-from databricks.sdk import WorkspaceClient
 import json
 import uuid
 import logging
+import functools
 
 logging.basicConfig(
     format="%(levelname)s [%(asctime)s] %(name)s - %(message)s",
@@ -10,14 +9,33 @@ logging.basicConfig(
     level=logging.DEBUG
 )
 
+@functools.lru_cache(maxsize=1)
+def _get_workspace_client():
+    """Shared WorkspaceClient; building one resolves auth config and opens an HTTP session."""
+    # Imported on first use so importing this module stays cheap
+    from databricks.sdk import WorkspaceClient
+    return WorkspaceClient()
+
+@functools.lru_cache(maxsize=1)
+def _get_deploy_client():
+    """Shared MLflow deployments client for Databricks serving endpoints."""
+    from mlflow.deployments import get_deploy_client
+    return get_deploy_client("databricks")
+
+# Endpoint task types found so far; lookup failures are not remembered so they are retried
+_endpoint_task_types = {}
+
 def _get_endpoint_task_type(endpoint_name: str) -> str:
     """Get the task type of a serving endpoint."""
+    if endpoint_name in _endpoint_task_types:
+        return _endpoint_task_types[endpoint_name]
     try:
-        w = WorkspaceClient()
-        ep = w.serving_endpoints.get(endpoint_name)
-        return ep.task if ep.task else "chat/completions"
+        ep = _get_workspace_client().serving_endpoints.get(endpoint_name)
+        task_type = ep.task if ep.task else "chat/completions"
     except Exception:
         return "chat/completions"
+    _endpoint_task_types[endpoint_name] = task_type
+    return task_type
 
 def _convert_to_responses_format(messages):
     """Convert chat messages to ResponsesAgent API format."""
@@ -74,7 +92,7 @@ def query_endpoint_stream(endpoint_name: str, messages: list[dict[str, str]]):
 def _query_chat_endpoint_stream(endpoint_name: str, messages: list[dict[str, str]]):
     """Invoke an endpoint that implements chat completions and stream the response"""
     logger = logging.getLogger(__name__)
-    client = get_deploy_client("databricks")
+    client = _get_deploy_client()
 
     # Prepare input payload
     inputs = {
@@ -99,7 +117,7 @@ def _query_chat_endpoint_stream(endpoint_name: str, messages: list[dict[str, str
 def _query_responses_endpoint_stream(endpoint_name: str, messages: list[dict[str, str]]):
     """Stream responses from agent/v1/responses endpoints using MLflow deployments client."""
     logger = logging.getLogger(__name__)
-    client = get_deploy_client("databricks")
+    client = _get_deploy_client()
     
     input_messages = _convert_to_responses_format(messages)
     